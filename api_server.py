@@ -0,0 +1,243 @@
+import argparse
+import json
+import math
+import traceback
+from datetime import date, datetime, time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import requests
+
+import core
+
+# ==========================================
+# OlyMate JSON API 서버
+# ==========================================
+# core 모듈의 데이터/색인/그래프를 프로세스 시작 시 한 번 올려 두고
+# 요청마다 스레드 하나로 처리한다 (표준 라이브러리만 사용).
+#
+#   GET /search?q=화장실&venue=KSPO DOME      시설 검색 (공연장 기준 거리순)
+#   GET /recommend?q=배고파&venue=올림픽홀      주변 맛집/카페 추천
+#   GET /nearest?keyword=화장실&venue=KSPO DOME&k=5   보행 거리 최근접
+#   GET /nearest?keyword=편의점&lat=37.51&lon=127.12  좌표 기준 직선 최근접
+#   GET /weather                                현재 단기예보 (?date=2025-12-06&hour=19 이면 그 시각 예보)
+#   GET /concerts                               공연 목록 (?date=2025-12-06&venue=KSPO DOME, ?now=1)
+#   GET /metrics                                엔드포인트별 처리 시간 (Prometheus 텍스트)
+#
+#   python api_server.py --host 0.0.0.0 --port 8080
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 200
+
+
+class BadRequest(ValueError):
+    pass
+
+
+class UpstreamError(RuntimeError):
+    """외부 API(기상청/KSPO)에서 값을 받지 못함 -> 502."""
+
+
+def _json_default(obj):
+    if isinstance(obj, np.integer):
+        return int(obj)
+    if isinstance(obj, np.floating):
+        return float(obj)
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    return str(obj)
+
+
+def _records(df):
+    # NaN/inf는 JSON에 넣을 수 없으므로 None으로
+    rows = df.to_dict(orient="records")
+    for row in rows:
+        for k, v in row.items():
+            if isinstance(v, float) and not math.isfinite(v):
+                row[k] = None
+    return rows
+
+
+def _int_param(params, name, default, lo=1, hi=MAX_LIMIT):
+    try:
+        value = int(params.get(name, default))
+    except ValueError:
+        raise BadRequest(f"{name} must be an integer")
+    return max(lo, min(hi, value))
+
+
+def _origin(params):
+    """lat/lon이 있으면 그 좌표, venue가 있으면 공연장 좌표, 둘 다 없으면 None."""
+    if "lat" in params or "lon" in params:
+        try:
+            lat, lon = float(params["lat"]), float(params["lon"])
+        except (KeyError, ValueError):
+            raise BadRequest("lat and lon must both be numbers")
+        if not (math.isfinite(lat) and math.isfinite(lon)):
+            raise BadRequest("lat and lon must be finite numbers")
+        return lat, lon
+    if params.get("venue"):
+        return tuple(core.venue_location(params["venue"]))
+    return None
+
+
+# --- 엔드포인트 ---
+def search(params):
+    query = params.get("q", "").strip()
+    if not query:
+        raise BadRequest("q is required")
+    origin = _origin(params)
+    results, term = core.get_agent().search_facility(query, origin)
+    limit = _int_param(params, "limit", DEFAULT_LIMIT)
+    return {"query": query, "term": term, "total": len(results), "results": _records(results.head(limit))}
+
+
+def recommend(params):
+    query = params.get("q", "").strip()
+    if not query:
+        raise BadRequest("q is required")
+    results = core.get_agent().recommend_place(query, _origin(params))
+    limit = _int_param(params, "limit", DEFAULT_LIMIT)
+    return {"query": query, "total": len(results), "results": _records(results.head(limit))}
+
+
+def nearest(params):
+    keyword = params.get("keyword", "").strip()
+    if not keyword:
+        raise BadRequest("keyword is required")
+    k = _int_param(params, "k", 5)
+    agent = core.get_agent()
+    if params.get("venue") and "lat" not in params:
+        # 공연장 기준은 미리 계산한 보행 최단 경로 트리로
+        venue = core.venue_key(params["venue"])
+        rows = agent.fac_index.lookup(agent.synonyms.get(keyword, keyword))
+        ids, dist = core.get_walk_graph().nearest(venue, rows, k)
+        results = agent.fac_df.iloc[ids].assign(보행거리=dist)
+        return {"keyword": keyword, "venue": venue, "mode": "walk", "results": _records(results)}
+    origin = _origin(params)
+    if origin is None:
+        raise BadRequest("venue or lat/lon is required")
+    results = agent.nearest_facility(keyword, origin, k)
+    return {"keyword": keyword, "origin": origin, "mode": "straight", "results": _records(results)}
+
+
+def weather(params):
+    when = None
+    if params.get("date"):
+        try:
+            when = datetime.combine(date.fromisoformat(params["date"]), time(_int_param(params, "hour", 0, lo=0, hi=23)))
+        except ValueError:
+            raise BadRequest("date must be YYYY-MM-DD and hour 0-23")
+    table = core.get_forecast()
+    if table is None:
+        raise UpstreamError("weather forecast unavailable")
+    info = core.weather_at(table, when)
+    if info is None and when is None:
+        raise UpstreamError("weather forecast unavailable")
+    if info is None:
+        raise BadRequest(f"no forecast for {when:%Y-%m-%d %H}:00 (issued {table.base_date} {table.base_time})")
+    return info
+
+
+def concerts(params):
+    catalog = core.get_concert_catalog()
+    venue = core.venue_key(params["venue"]) if params.get("venue") else None
+    if params.get("date"):
+        try:
+            day = date.fromisoformat(params["date"])
+        except ValueError:
+            raise BadRequest("date must be YYYY-MM-DD")
+        return {"date": day, "venue": venue, "concerts": catalog.on(day, venue)}
+    if params.get("now"):
+        return {"date": date.today(), "concerts": catalog.now()}
+    return {"concerts": catalog.concerts}
+
+
+def health(params):
+    df_fac, _, _, df_rest = core.load_data()[:4]
+    return {"status": "ok", "facilities": len(df_fac), "restaurants": len(df_rest),
+            "weather_cache": core.get_weather_cache().stats()}
+
+
+ROUTES = {
+    "/search": search,
+    "/recommend": recommend,
+    "/nearest": nearest,
+    "/weather": weather,
+    "/concerts": concerts,
+    "/health": health,
+}
+
+
+class Handler(BaseHTTPRequestHandler):
+    server_version = "OlyMateAPI/1.0"
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        path = url.path.rstrip("/") or "/"
+        if path == "/metrics":
+            return self._send_text(200, core.get_profiler().prometheus(), "text/plain; version=0.0.4; charset=utf-8")
+        endpoint = ROUTES.get(path)
+        if endpoint is None:
+            return self._send(404, {"error": f"unknown endpoint {url.path}"})
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        try:
+            with core.get_profiler().span("api" + path):
+                body = endpoint(params)
+        except BadRequest as e:
+            return self._send(400, {"error": str(e)})
+        except (UpstreamError, requests.RequestException) as e:
+            # 외부 API(기상청/KSPO) 실패만 502로
+            return self._send(502, {"error": f"{type(e).__name__}: {e}"})
+        except Exception:
+            # 우리 코드의 오류는 500 (내용은 서버 로그에만)
+            traceback.print_exc()
+            return self._send(500, {"error": "internal server error"})
+        self._send(200, body)
+
+    def _send(self, status, body):
+        self._send_text(status, json.dumps(body, ensure_ascii=False, default=_json_default), "application/json; charset=utf-8")
+
+    def _send_text(self, status, text, content_type):
+        data = text.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+def make_server(host="127.0.0.1", port=8080, verbose=False):
+    # 첫 요청이 색인/그래프 생성을 기다리지 않도록 미리 올려 둔다
+    core.get_agent()
+    core.get_walk_graph()
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    server.verbose = verbose
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OlyMate JSON API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+    server = make_server(args.host, args.port, args.verbose)
+    print(f"OlyMate API listening on http://{args.host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,376 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# ==========================================
+# OlyMate 벤치마크
+# ==========================================
+# 합성 시설/맛집 데이터(160 / 1만 / 10만 / 100만 행)로
+# load_data(), SmartAgent.search_facility / recommend_place (+ BM25 행렬 생성), 탭 3 지도 생성과 직렬화,
+# 날씨 조회(로컬 기상청 스텁)를 측정한다. 네트워크 없이 돈다.
+#
+# - 지연 시간은 백분위수(p50/p90/p99, ms), 메모리는 tracemalloc 최대치와 프로세스 최대 RSS,
+#   지도는 레이어를 붙인 folium 지도를 렌더링한 크기(payload_bytes)를 기록한다 (st_folium이 보내는 JS + 고정 머리말).
+# - 크기마다 별도 프로세스에서 돌려 메모리 수치가 서로 섞이지 않게 한다.
+# - 결과는 bench_results/ 아래 JSON으로 저장하고, --compare로 이전 결과와 p50을 비교한다.
+#
+#   python bench.py                         # 전체 (160, 10k, 100k, 1M)
+#   python bench.py --sizes 160 10000 --repeat 3
+#   python bench.py --compare bench_results/bench-abc1234-....json
+
+SIZES = [160, 10_000, 100_000, 1_000_000]
+RESULTS_DIR = "bench_results"
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+VENUE = "KSPO DOME"
+
+# 실제 사용 패턴에 가까운 한/영 질의 (정확 일치, 동의어, 문장형, 오타, 결과 없음)
+FACILITY_QUERIES = [
+    "화장실", "화장실 어디야", "편의점", "자판기", "물 마시는 곳", "흡연장", "쓰레기통", "음수대",
+    "88마당 화장실", "평화의 광장",
+    "where is the toilet", "restroom", "convenience store", "smoking area", "vending machine",
+    "water fountain", "trash bin", "food court",
+    "화장싷", "편의잠", "toliet", "자판긔",
+    "주차장",
+]
+RESTAURANT_QUERIES = [
+    "배고파", "밥 먹을 곳", "맛집 추천", "파스타", "국수", "조용한 카페", "목말라", "커피",
+    "hungry", "dinner restaurant", "coffee", "quiet cafe", "brunch", "noodle", "BBQ", "thirsty",
+]
+
+# 합성 데이터 재료
+DETAIL_SUFFIXES = ["앞", "내부", "옆", "뒤", "맞은편", "입구", "계단 아래"]
+REST_PREFIXES = ["빈체로", "제일제면소", "몽중헌", "청와옥", "소담", "송도", "산들해", "봉피양", "프로퍼",
+                 "온온", "담금", "Olympic", "Park", "Blue", "Green", "Han River", "Seoul", "Morning"]
+REST_KINDS = [
+    ("음식점", "가성비 좋은 파스타 / Pasta"), ("음식점", "넓고 쾌적한 국수집 / Noodle"),
+    ("중식", "고급스러운 딤섬 맛집 / Chinese Dimsum"), ("한식", "줄서서 먹는 순대국 / Korean Soup"),
+    ("국수", "꼬막과 국수가 맛있는 노포 / Noodle"), ("BBQ", "된장찌개 서비스 고기집 / BBQ"),
+    ("한정식", "푸짐한 이천쌀밥 한상 / Korean Table"), ("카페", "분위기 좋은 베이커리 카페 / Bakery Cafe"),
+    ("카페", "콘센트 많아 작업하기 좋음 / Good for work"), ("카페", "수다 떨기 좋은 아늑한 곳 / Cozy Cafe"),
+    ("제과점", "브런치 하기 좋은 곳 / Brunch"), ("분식", "떡볶이와 김밥 / Tteokbokki"),
+]
+
+
+# ==========================================
+# 합성 데이터
+# ==========================================
+def synth_facilities(n, seed=0):
+    """실제 facilities.csv의 구분/위치 분포와 좌표 주변으로 n행을 만든다.
+    행이 늘면 구역(위치)도 늘어나서 고유값 수가 현실적으로 (행 수보다 느리게) 증가한다."""
+    rng = np.random.default_rng(seed)
+    real = pd.read_csv(os.path.join(BENCH_DIR, "facilities.csv")).fillna("")
+    src = rng.integers(0, len(real), n)
+    zones = max(1, n // 2000)
+    zone = rng.integers(0, zones, n)
+    locations = real['위치'].to_numpy()[src].astype(object)
+    if zones > 1:
+        locations = np.where(zone > 0, locations + " " + zone.astype(str) + "구역", locations)
+    details = (rng.integers(1, 31, n).astype(str).astype(object) + "-" + rng.integers(1, 10, n).astype(str)
+               + "게이트 " + np.array(DETAIL_SUFFIXES, dtype=object)[rng.integers(0, len(DETAIL_SUFFIXES), n)])
+    # 실제 좌표 주변 ~200m 흩뿌림 (공원 밖으로 너무 멀리 나가지 않게 자른다)
+    lats = np.clip(real['위도'].to_numpy(float)[src] + rng.normal(0, 0.0018, n), 37.505, 37.530)
+    lons = np.clip(real['경도'].to_numpy(float)[src] + rng.normal(0, 0.0022, n), 127.110, 127.140)
+    return pd.DataFrame({
+        "순번": np.arange(1, n + 1),
+        "구분": real['구분'].to_numpy()[src],
+        "위치": locations,
+        "상세위치": details,
+        "위도": lats.round(7),
+        "경도": lons.round(7),
+        "비고": np.where(rng.random(n) < 0.1, "여자화장실", ""),
+    })
+
+
+def synth_restaurants(n, seed=0):
+    """restaurants.csv와 같은 컬럼(name/category/desc/lat/lon)의 n행."""
+    rng = np.random.default_rng(seed + 1)
+    kind = rng.integers(0, len(REST_KINDS), n)
+    prefix = np.array(REST_PREFIXES, dtype=object)[rng.integers(0, len(REST_PREFIXES), n)]
+    return pd.DataFrame({
+        "name": prefix + " " + np.arange(n).astype(str).astype(object) + "호점",
+        "category": [REST_KINDS[k][0] for k in kind],
+        "desc": [REST_KINDS[k][1] for k in kind],
+        "lat": (37.5175 + rng.normal(0, 0.006, n)).round(6),
+        "lon": (127.1255 + rng.normal(0, 0.008, n)).round(6),
+    })
+
+
+# ==========================================
+# 측정 도구
+# ==========================================
+def summarize(samples_ms):
+    a = np.asarray(samples_ms, dtype=np.float64)
+    return {
+        "n": int(len(a)),
+        "mean_ms": round(float(a.mean()), 4),
+        "p50_ms": round(float(np.percentile(a, 50)), 4),
+        "p90_ms": round(float(np.percentile(a, 90)), 4),
+        "p99_ms": round(float(np.percentile(a, 99)), 4),
+        "max_ms": round(float(a.max()), 4),
+    }
+
+
+def time_calls(fn, args_list, budget_s):
+    """args_list를 차례로 호출한 지연 시간(ms). budget_s를 넘기면 (최소 3회 후) 멈춘다."""
+    samples = []
+    deadline = time.perf_counter() + budget_s
+    for args in args_list:
+        t0 = time.perf_counter()
+        fn(*args)
+        samples.append((time.perf_counter() - t0) * 1000.0)
+        if len(samples) >= 3 and time.perf_counter() > deadline:
+            break
+    return samples
+
+
+def peak_memory(fn):
+    """fn() 한 번 동안의 Python 할당 최대치(bytes)."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def map_payload(m, groups):
+    """레이어를 붙인 지도를 folium 공개 API로 렌더링한 HTML 크기 (bytes).
+    st_folium 내부 직렬화 함수(_get_map_string 등)는 비공개라 쓰지 않는다. 내용은 st_folium이 보내는 JS와 같고
+    고정 크기의 HTML 머리말(스크립트/스타일 링크)만 더 붙는다."""
+    for group in groups:
+        group.add_to(m)
+    return len(m.get_root().render().encode("utf-8"))
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+# ==========================================
+# 단계별 측정 (크기 하나, 워커 프로세스 안에서)
+# ==========================================
+def bench_size(n, repeat, budget_s, memory=True):
+    import folium
+    import core
+    from map_layers import MAP_KEYWORDS, build_layer_geojson, build_pyramids, view_bounds, viewport_groups
+    from recommender import RestaurantRanker
+
+    stages = {}
+
+    def record(name, samples, mem_fn=None, **extra):
+        stats = summarize(samples)
+        if memory and mem_fn is not None:
+            stats["peak_mem_bytes"] = int(peak_memory(mem_fn))
+        stats.update(extra)
+        stages[name] = stats
+        print(f"  {n:>9,} {name:<22} p50 {stats['p50_ms']:>10.3f} ms  p99 {stats['p99_ms']:>10.3f} ms"
+              + (f"  peak {stats['peak_mem_bytes'] / 2**20:8.1f} MiB" if "peak_mem_bytes" in stats else "")
+              + (f"  payload {extra['payload_bytes'] / 1024:8.1f} KiB" if "payload_bytes" in extra else ""),
+              file=sys.stderr, flush=True)
+
+    fac = synth_facilities(n)
+    rest = synth_restaurants(n)
+
+    # load_data(): 열 캐시 만들기(CSV 파싱) + 색인 생성, 그리고 캐시가 있을 때의 시작 비용
+    with tempfile.TemporaryDirectory() as data_dir:
+        fac.to_csv(os.path.join(data_dir, "facilities.csv"), index=False)
+        rest.to_csv(os.path.join(data_dir, "restaurants.csv"), index=False)
+        for name in ("parktel_users.csv", "parktel_food.csv"):
+            shutil.copy(os.path.join(BENCH_DIR, name), data_dir)
+        cache_dir = os.path.join(data_dir, "cache")
+        build = core.load_data.__wrapped__
+
+        def cold():
+            shutil.rmtree(cache_dir, ignore_errors=True)
+            return build(data_dir, cache_dir)
+        reps = repeat if n <= 100_000 else 1
+        record("load_data_cold", time_calls(cold, [()] * reps, budget_s), cold,
+               csv_bytes=os.path.getsize(os.path.join(data_dir, "facilities.csv")))
+        record("load_data", time_calls(build, [(data_dir, cache_dir)] * reps, budget_s),
+               lambda: build(data_dir, cache_dir))
+        df_fac, _, _, rest, fac_index, fac_geo, rest_geo = build(data_dir, cache_dir)
+
+    agent = core.SmartAgent(df_fac, rest, fac_index, fac_geo, rest_geo)
+    origin = core.VENUE_LOCATIONS[VENUE]
+
+    # 시설 검색: 첫 조회(색인 메모 없음)와 반복 조회
+    def search_cold(q):
+        fac_index._cache.clear()
+        agent.search_facility(q, origin)
+    queries = [(q,) for q in FACILITY_QUERIES]
+    record("search_facility_cold", time_calls(search_cold, queries * repeat, budget_s),
+           lambda: [search_cold(q) for q in FACILITY_QUERIES])
+    record("search_facility", time_calls(lambda q: agent.search_facility(q, origin), queries * repeat, budget_s),
+           lambda: [agent.search_facility(q, origin) for q in FACILITY_QUERIES])
+
+    # 맛집 추천: BM25 행렬 생성(에이전트당 한 번)과 질의, 상위 10개만
+    build_ranker = lambda: RestaurantRanker(rest)
+    record("ranker_build", time_calls(build_ranker, [()] * (repeat if n <= 100_000 else 1), budget_s), build_ranker)
+    queries = [(q,) for q in RESTAURANT_QUERIES]
+    record("recommend_place_top10", time_calls(lambda q: agent.recommend_place(q, origin, k=10), queries * repeat,
+                                               budget_s))
+    record("recommend_place", time_calls(lambda q: agent.recommend_place(q, origin), queries * repeat, budget_s),
+           lambda: [agent.recommend_place(q, origin) for q in RESTAURANT_QUERIES[:4]])
+
+    # 지도 레이어/피라미드: 프로세스당 한 번 만드는 비용
+    def build_layers():
+        return build_pyramids(build_layer_geojson(df_fac, rest, fac_index))
+    samples = time_calls(build_layers, [()] * (repeat if n <= 100_000 else 1), budget_s)
+    record("map_layers_build", samples, build_layers)
+    pyramids = build_layers()
+
+    # 탭 3 rerun: 기본 지도 + 화면 안 타일 레이어 생성 + 직렬화 (필터 전부 켬, 타일 캐시 없음)
+    for zoom in (16, 13):
+        def rerun():
+            m = folium.Map(location=origin, zoom_start=zoom)
+            folium.Marker(origin, popup=folium.Popup(f"<b>{VENUE}</b>", min_width=200, max_width=300),
+                          icon=folium.Icon(color='red', icon='star')).add_to(m)
+            groups = viewport_groups(pyramids, MAP_KEYWORDS, view_bounds(origin, zoom, 1400, 600), zoom)
+            return map_payload(m, groups)
+        payload = rerun()
+        record(f"map_rerun_z{zoom}", time_calls(rerun, [()] * repeat, budget_s), rerun, payload_bytes=int(payload))
+
+    return {"rows": n, "restaurants": len(rest), "stages": stages,
+            "rss_max_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0, 1)}
+
+
+def bench_weather(repeat, latency):
+    """로컬 기상청 스텁에 대한 fetch_forecast(격자 전체, 병렬 페이지)와 get_weather(공유 표 조회)."""
+    import core
+    from datetime import timedelta
+    from forecast_cache import ForecastCache
+    from kma_stub import KMAStub
+
+    with KMAStub(latency=latency) as stub:
+        core.WEATHER_URL = stub.url
+        key = core.forecast_base() + (core.NX, core.NY)
+        fetch = time_calls(lambda: core.fetch_forecast(key, api_key="bench"), [()] * max(repeat * 5, 10), 30)
+        calls_per_fetch = stub.calls / max(len(fetch), 1)
+        cache = ForecastCache()
+        hits = time_calls(lambda: core.get_weather(cache, api_key="bench"), [()] * max(repeat * 200, 100), 10)
+        show_time = datetime.now().replace(minute=0, second=0, microsecond=0) + timedelta(days=1, hours=2)
+        lookups = time_calls(lambda: core.get_weather(cache, api_key="bench", when=show_time),
+                             [()] * max(repeat * 200, 100), 10)
+        table = core.get_forecast(cache, api_key="bench")
+        calls = stub.calls
+    return {"fetch_forecast": summarize(fetch), "get_weather_cached": summarize(hits),
+            "get_weather_show_time": summarize(lookups), "pages_per_fetch": calls_per_fetch,
+            "forecast_values": len(table) if table is not None else 0,
+            "stub_latency_s": latency, "upstream_calls": calls}
+
+
+# ==========================================
+# 실행 / 비교
+# ==========================================
+def run_worker(args):
+    if args.worker == "weather":
+        result = bench_weather(args.repeat, args.stub_latency)
+    else:
+        result = bench_size(int(args.worker), args.repeat, args.budget, memory=not args.no_memory)
+    json.dump(result, sys.stdout)
+
+
+def run_all(args):
+    results = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "repeat": args.repeat,
+            "facility_queries": FACILITY_QUERIES,
+            "restaurant_queries": RESTAURANT_QUERIES,
+        },
+        "sizes": {},
+    }
+    base_cmd = [sys.executable, os.path.abspath(__file__), "--repeat", str(args.repeat),
+                "--budget", str(args.budget), "--stub-latency", str(args.stub_latency)]
+    if args.no_memory:
+        base_cmd.append("--no-memory")
+    env = dict(os.environ, OLYMATE_WEATHER_URL="http://127.0.0.1:9/unused")   # 실수로라도 실제 API를 부르지 않게
+
+    for target in ["weather"] + [str(n) for n in args.sizes]:
+        print(f"[bench] {target}", file=sys.stderr, flush=True)
+        proc = subprocess.run(base_cmd + ["--worker", target], cwd=BENCH_DIR, env=env,
+                              stdout=subprocess.PIPE, text=True)
+        if proc.returncode != 0:
+            result = {"error": f"worker exited with {proc.returncode}"}
+        else:
+            result = json.loads(proc.stdout)
+        if target == "weather":
+            results["weather"] = result
+        else:
+            results["sizes"][target] = result
+
+    out = args.out or os.path.join(BENCH_DIR, RESULTS_DIR,
+                                   f"bench-{results['meta']['commit'] or 'nogit'}-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"[bench] 결과 저장: {out}", file=sys.stderr)
+    return results
+
+
+def compare(base, current, threshold):
+    """두 결과의 p50을 비교해 threshold배 이상 느려진 단계 목록을 돌려준다."""
+    regressions = []
+    for size, cur in current.get("sizes", {}).items():
+        old = base.get("sizes", {}).get(size, {})
+        for stage, stats in cur.get("stages", {}).items():
+            prev = old.get("stages", {}).get(stage)
+            if not prev or not prev.get("p50_ms"):
+                continue
+            ratio = stats["p50_ms"] / prev["p50_ms"]
+            flag = "REGRESSION" if ratio >= threshold else ""
+            print(f"{size:>9} {stage:<22} {prev['p50_ms']:>10.3f} -> {stats['p50_ms']:>10.3f} ms  x{ratio:5.2f} {flag}")
+            if flag:
+                regressions.append((size, stage, ratio))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OlyMate benchmark suite (offline)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--repeat", type=int, default=5, help="질의 묶음/빌드 반복 횟수")
+    parser.add_argument("--budget", type=float, default=60.0, help="단계별 최대 측정 시간(초)")
+    parser.add_argument("--stub-latency", type=float, default=0.0, help="기상청 스텁 응답 지연(초)")
+    parser.add_argument("--no-memory", action="store_true", help="tracemalloc 측정 생략")
+    parser.add_argument("--out", help="결과 JSON 경로 (기본: bench_results/bench-<commit>-<시각>.json)")
+    parser.add_argument("--compare", help="비교할 이전 결과 JSON")
+    parser.add_argument("--threshold", type=float, default=1.25, help="이 배수 이상 느려지면 회귀로 표시")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        return run_worker(args)
+    results = run_all(args)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            base = json.load(f)
+        if compare(base, results, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
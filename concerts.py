@@ -0,0 +1,266 @@
+import bisect
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import date
+
+from crowd import parse_date_range
+
+# ==========================================
+# 공연 정보 수집 (KSPO 공연 API -> 로컬 스냅샷 -> 구간 색인)
+# ==========================================
+# - 스냅샷(JSON)에 원본 항목과 ETag/Last-Modified/내용 해시를 저장해 두고 시작 시 바로 읽는다.
+#   저장소에 든 스냅샷은 읽기 전용 씨앗(seed_path)이고, 동기화 결과는 런타임 경로(snapshot_path)에만 쓴다.
+#   시작할 때는 런타임 스냅샷을 먼저 읽고, 없거나 깨졌으면 씨앗으로 시작한다.
+# - sync()는 If-None-Match / If-Modified-Since 조건부 요청을 보내 304면 아무것도 하지 않는다.
+#   서버가 검증자를 주지 않으면 전체 내용 해시로 변경 여부를 판단하고, 항목별 해시로 바뀐 것만 다시 정규화한다.
+# - 정규화는 항목당 한 번: "2025-12-05 ~ 07" 같은 기간 문자열 -> (시작일, 종료일), 공연장 이름 -> 좌표.
+# - ConcertCatalog는 공연장별/전체 구간 색인을 들고 있어
+#   "X 공연장 Y일 공연"과 "지금 진행 중인 공연"이 이분 탐색 한 번 (O(log n + 결과 수)) 이다.
+#
+# API 응답 형식 (공공데이터포털 관례를 따름, kspo_stub.py가 같은 형식을 흉내 낸다):
+#   {"response": {"header": {"resultCode": "00"},
+#                 "body": {"items": {"item": [{"perfId", "perfNm", "perfPlace", "perfPeriod", "perfUrl", "updtDt"}]},
+#                          "pageNo", "numOfRows", "totalCount"}}}
+
+SNAPSHOT_VERSION = 1
+PAGE_SIZE = 100
+
+
+def _item_hash(item):
+    return hashlib.sha256(json.dumps(item, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _content_hash(items):
+    h = hashlib.sha256()
+    for key in sorted(items):
+        h.update(items[key]["hash"].encode())
+    return h.hexdigest()
+
+
+# --- 구간 색인 ---
+class IntervalIndex:
+    """닫힌 구간 [start, end] (정수) 목록에 대한 정적 색인.
+    모든 끝점으로 수직선을 기본 구간으로 나누고 구간마다 걸쳐 있는 id 목록을 미리 만들어 두어
+    점 질의는 bisect 한 번으로 끝난다."""
+
+    def __init__(self, intervals):
+        # intervals: [(start, end, id), ...]
+        bounds = sorted({s for s, _, _ in intervals} | {e + 1 for _, e, _ in intervals})
+        self.bounds = bounds
+        events = sorted([(s, 1, i) for s, _, i in intervals] + [(e + 1, -1, i) for _, e, i in intervals])
+        self.active = []
+        current = set()
+        k = 0
+        for b in bounds:
+            while k < len(events) and events[k][0] == b:
+                _, kind, i = events[k]
+                if kind > 0:
+                    current.add(i)
+                else:
+                    current.discard(i)
+                k += 1
+            self.active.append(tuple(sorted(current)))
+
+    def at(self, point):
+        """point를 포함하는 구간 id들."""
+        i = bisect.bisect_right(self.bounds, point) - 1
+        return self.active[i] if i >= 0 else ()
+
+    def overlapping(self, lo, hi):
+        """[lo, hi]와 겹치는 구간 id들 (정렬)."""
+        i = max(bisect.bisect_right(self.bounds, lo) - 1, 0)
+        j = bisect.bisect_right(self.bounds, hi)
+        found = set()
+        for ids in self.active[i:j]:
+            found.update(ids)
+        return tuple(sorted(found))
+
+
+# --- 정규화된 공연 목록 ---
+def normalize(item, venue_key, venue_locations):
+    """API 항목 하나를 앱이 쓰는 공연 dict로 (날짜/공연장 해석은 여기서 한 번만)."""
+    start, end = parse_date_range(item["perfPeriod"])
+    venue = venue_key(item["perfPlace"])
+    lat, lon = venue_locations[venue]
+    return {
+        "id": item["perfId"], "title": item["perfNm"], "date": item["perfPeriod"], "place": item["perfPlace"],
+        "link": item.get("perfUrl", ""), "start": start, "end": end, "venue": venue, "lat": lat, "lon": lon,
+    }
+
+
+class ConcertCatalog:
+    def __init__(self, concerts):
+        self.concerts = sorted(concerts, key=lambda c: (c["start"], c["title"]))
+        self.by_id = {c["id"]: c for c in self.concerts}
+        self.by_title = {c["title"]: c for c in self.concerts}
+        spans = [(c["start"].toordinal(), c["end"].toordinal(), i) for i, c in enumerate(self.concerts)]
+        self._all = IntervalIndex(spans)
+        self._venue = {}
+        for venue in {c["venue"] for c in self.concerts}:
+            self._venue[venue] = IntervalIndex([s for s in spans if self.concerts[s[2]]["venue"] == venue])
+
+    def _index(self, venue):
+        return self._all if venue is None else self._venue.get(venue)
+
+    def on(self, day, venue=None):
+        """day(date)에 venue(None이면 전체)에서 열리는 공연."""
+        index = self._index(venue)
+        return [self.concerts[i] for i in index.at(day.toordinal())] if index else []
+
+    def overlapping(self, start, end, venue=None):
+        index = self._index(venue)
+        return [self.concerts[i] for i in index.overlapping(start.toordinal(), end.toordinal())] if index else []
+
+    def now(self, today=None):
+        """오늘 진행 중인 공연."""
+        return self.on(today or date.today())
+
+
+# --- 스냅샷 + 증분 동기화 ---
+class ConcertStore:
+    def __init__(self, snapshot_path, venue_key, venue_locations, url=None, api_key=None, min_interval=600.0,
+                 retry_interval=60.0, seed_path=None):
+        self.snapshot_path = snapshot_path
+        self.seed_path = seed_path
+        self.venue_key = venue_key
+        self.venue_locations = venue_locations
+        self.url = url
+        self.api_key = api_key
+        self.min_interval = min_interval
+        self.retry_interval = retry_interval
+        self._last_attempt = 0.0
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._normalized = {}       # perfId -> (항목 해시, 정규화된 공연)
+        self.meta = {"etag": None, "last_modified": None, "content_hash": None, "synced_at": 0.0}
+        self.items = {}             # perfId -> {"item": 원본, "hash": 해시}
+        self.stats = {"syncs": 0, "not_modified": 0, "unchanged": 0, "updated": 0, "failures": 0, "changed_items": 0}
+        self._load_snapshot()
+        self.catalog = self._build_catalog()
+
+    @staticmethod
+    def _read_snapshot(path):
+        if not path:
+            return None
+        try:
+            with open(path, encoding="utf-8") as f:
+                snap = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return snap if isinstance(snap, dict) and snap.get("version") == SNAPSHOT_VERSION else None
+
+    def _load_snapshot(self):
+        snap = self._read_snapshot(self.snapshot_path) or self._read_snapshot(self.seed_path)
+        if snap is None:
+            return
+        self.meta.update({k: snap.get(k) for k in ("etag", "last_modified", "content_hash")})
+        self.meta["synced_at"] = snap.get("synced_at") or 0.0
+        self.items = {k: {"item": v, "hash": _item_hash(v)} for k, v in snap.get("items", {}).items()}
+        self.meta["content_hash"] = self.meta["content_hash"] or _content_hash(self.items)
+
+    def _save_snapshot(self):
+        snap = dict(self.meta, version=SNAPSHOT_VERSION, items={k: v["item"] for k, v in sorted(self.items.items())})
+        directory = os.path.dirname(os.path.abspath(self.snapshot_path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix=".concerts-", suffix=".json")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(snap, f, ensure_ascii=False, indent=1)
+        os.replace(tmp, self.snapshot_path)
+
+    def _build_catalog(self):
+        # 항목 해시가 그대로면 예전 정규화 결과를 재사용 (바뀐 항목만 다시 해석)
+        normalized, concerts = {}, []
+        for key, entry in self.items.items():
+            cached = self._normalized.get(key)
+            if cached is not None and cached[0] == entry["hash"]:
+                record = cached[1]
+            else:
+                try:
+                    record = normalize(entry["item"], self.venue_key, self.venue_locations)
+                except (KeyError, ValueError):
+                    continue    # 기간/필드가 깨진 항목은 건너뛴다
+            normalized[key] = (entry["hash"], record)
+            concerts.append(record)
+        self._normalized = normalized
+        return ConcertCatalog(concerts)
+
+    def due(self, now=None):
+        # 성공 후 min_interval, 실패 후에는 retry_interval이 지나야 다시 시도
+        now = now or time.time()
+        return (bool(self.url) and now - (self.meta["synced_at"] or 0.0) >= self.min_interval
+                and now - self._last_attempt >= self.retry_interval)
+
+    def sync(self, http, force=False):
+        """원격 API와 맞춘다. 바뀌었으면 True. 실패하면 스냅샷을 그대로 두고 False."""
+        if not self.url or not (force or self.due()):
+            return False
+        if not self._sync_lock.acquire(blocking=False):
+            return False    # 다른 스레드가 이미 동기화 중
+        self._last_attempt = time.time()
+        try:
+            return self._sync(http)
+        except Exception:
+            self.stats["failures"] += 1
+            return False
+        finally:
+            self._sync_lock.release()
+
+    def _fetch_page(self, http, page, headers=None):
+        params = {"serviceKey": self.api_key, "pageNo": page, "numOfRows": PAGE_SIZE, "resultType": "json"}
+        response = http.get(self.url, params=params, headers=headers or {}, timeout=5)
+        if response.status_code == 304:
+            return response, None
+        response.raise_for_status()
+        body = response.json()["response"]
+        if body["header"]["resultCode"] != "00":
+            raise ValueError(body["header"].get("resultMsg", "API error"))
+        return response, body["body"]
+
+    def _sync(self, http):
+        self.stats["syncs"] += 1
+        headers = {}
+        if self.meta["etag"]:
+            headers["If-None-Match"] = self.meta["etag"]
+        if self.meta["last_modified"]:
+            headers["If-Modified-Since"] = self.meta["last_modified"]
+        response, body = self._fetch_page(http, 1, headers)
+        if body is None:
+            self.stats["not_modified"] += 1
+            self.meta["synced_at"] = time.time()
+            return False
+
+        raw = list(body["items"]["item"] or [])
+        pages = -(-int(body.get("totalCount", len(raw))) // PAGE_SIZE)
+        for page in range(2, pages + 1):
+            raw.extend(self._fetch_page(http, page)[1]["items"]["item"] or [])
+
+        items = {}
+        for item in raw:
+            h = _item_hash(item)
+            items[item["perfId"]] = {"item": item, "hash": h}
+        content_hash = _content_hash(items)
+        self.meta.update(etag=response.headers.get("ETag"), last_modified=response.headers.get("Last-Modified"),
+                         synced_at=time.time())
+        if content_hash == self.meta["content_hash"]:
+            self.stats["unchanged"] += 1
+            self._save_snapshot()
+            return False
+
+        changed = sum(1 for k, v in items.items() if self.items.get(k, {}).get("hash") != v["hash"])
+        changed += sum(1 for k in self.items if k not in items)
+        with self._lock:
+            self.items = items
+            self.meta["content_hash"] = content_hash
+            self.catalog = self._build_catalog()
+        self.stats["updated"] += 1
+        self.stats["changed_items"] += changed
+        self._save_snapshot()
+        return True
+
+    def concerts(self):
+        return self.catalog.concerts
+
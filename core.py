@@ -0,0 +1,305 @@
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+
+from concerts import ConcertStore
+from crowd import CrowdModel
+from data_cache import cache_root, has_source, load_table
+from forecast import ForecastTable, fetch_items
+from forecast_cache import ForecastCache
+from profiler import Profiler, profiling_enabled, serve_metrics
+from recommender import RestaurantRanker
+from routing import WalkingGraph
+from search_index import FacilityIndex
+from spatial import SpatialIndex
+
+# ==========================================
+# OlyMate 코어 (Streamlit 없이 import 가능)
+# ==========================================
+# 데이터 로드, SmartAgent, 날씨/공연 조회를 모아 둔 모듈.
+# Streamlit 앱(app.py)과 JSON API 서버(api_server.py)가 같은 코드를 쓰며,
+# 무거운 객체는 모두 프로세스당 한 번만 만든다.
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# 좌표 설정
+NX, NY = 62, 126
+VENUE_LOCATIONS = {
+    "KSPO DOME": [37.5192018, 127.126537],
+    "올림픽체조경기장": [37.5192018, 127.126537],
+    "핸드볼경기장": [37.5177339, 127.1257116],
+    "올림픽홀": [37.5150613, 127.1271355],
+    "우리금융아트홀": [37.5174938, 127.1250809],
+    "올림픽공원": [37.5185463, 127.1270634]
+}
+
+# 한글 및 영어 동의어 사전 (소문자 기준)
+SYNONYMS = {
+    # 시설 (한글)
+    "물": "음수대", "물마시는곳": "음수대", "식수": "음수대",
+    "화장실": "화장실", "변소": "화장실",
+    "담배": "흡연구역", "흡연": "흡연구역", "흡연장": "흡연구역",
+    "쓰레기": "쓰레기통", "휴지통": "쓰레기통",
+    "음료수": "자판기", "과자": "자판기",
+    "밥": "식음료판매점", "식당": "식음료판매점", 
+    
+    # Facility (English Mapping to Korean Data)
+    "toilet": "화장실", "restroom": "화장실", "wc": "화장실", "bathroom": "화장실",
+    "store": "편의점", "convenience": "편의점", "cvs": "편의점", "shop": "편의점",
+    "smoking": "흡연구역", "smoke": "흡연구역", "cigarette": "흡연구역", "area": "흡연구역", # Smoking Area 처리
+    "trash": "쓰레기통", "bin": "쓰레기통", "can": "쓰레기통", "rubbish": "쓰레기통",
+    "vending": "자판기", "machine": "자판기",
+    "food": "식음료판매점", "court": "식음료판매점", "snack": "식음료판매점",
+    "water": "음수대", "drinking": "음수대", "fountain": "음수대", "drink": "음수대"
+}
+
+
+# ==========================================
+# 데이터 로드
+# ==========================================
+@lru_cache(maxsize=2)
+def load_data(data_dir=DATA_DIR, cache_dir=None):
+    # CSV 대신 열 단위 캐시(data_cache)를 mmap으로 연다. CSV가 바뀌면 캐시를 다시 만든다.
+    # 빈 표로 시작하는 것은 원본 CSV가 없을 때뿐 (캐시를 쓸 수 없으면 load_table이 CSV를 바로 읽는다)
+    if all(has_source(name, data_dir) for name in ("facilities", "parktel_users", "parktel_food")):
+        facilities = load_table("facilities", data_dir, cache_dir)
+        users = load_table("parktel_users", data_dir, cache_dir)
+        food = load_table("parktel_food", data_dir, cache_dir)
+    else:
+        facilities, users, food = pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
+    if has_source("restaurants", data_dir):
+        df_restaurants = load_table("restaurants", data_dir, cache_dir)
+    else:
+        df_restaurants = pd.DataFrame(columns=["name", "category", "desc", "lat", "lon"])
+    # 시설 검색 색인은 프로세스당 한 번만 만들어 모든 세션이 공유
+    fac_index = FacilityIndex(facilities, SYNONYMS)
+    # 시설/맛집 좌표 공간 색인 (거리순 정렬, 최근접/반경 질의용)
+    fac_geo = SpatialIndex(pd.to_numeric(facilities.get('위도', pd.Series(dtype=float)), errors='coerce'),
+                           pd.to_numeric(facilities.get('경도', pd.Series(dtype=float)), errors='coerce'))
+    rest_geo = SpatialIndex(df_restaurants['lat'], df_restaurants['lon'])
+    return facilities, users, food, df_restaurants, fac_index, fac_geo, rest_geo
+
+def venue_key(place):
+    """공연장 이름(부분 일치)으로 VENUE_LOCATIONS 키를 찾는다. 없으면 올림픽공원."""
+    key = "올림픽공원"
+    for k in VENUE_LOCATIONS:
+        if k in place: key = k
+    return key
+
+def venue_location(place):
+    """공연장 이름(부분 일치)으로 좌표를 찾는다. 없으면 올림픽공원 중심."""
+    return VENUE_LOCATIONS[venue_key(place)]
+
+# ==========================================
+# Agent 클래스 (영어 지원 업그레이드)
+# ==========================================
+class SmartAgent:
+    def __init__(self, fac_df, rest_df, fac_index=None, fac_geo=None, rest_geo=None):
+        self.fac_df = fac_df
+        self.rest_df = rest_df
+        self.fac_geo = fac_geo if fac_geo is not None else SpatialIndex(fac_df['위도'], fac_df['경도'])
+        self.rest_geo = rest_geo if rest_geo is not None else SpatialIndex(rest_df['lat'], rest_df['lon'])
+        # 한글 및 영어 동의어 사전 (소문자 기준)
+        self.synonyms = SYNONYMS
+        # load_data()에서 만든 공유 색인을 우선 사용
+        self.fac_index = fac_index if fac_index is not None else FacilityIndex(fac_df, self.synonyms)
+        # 맛집 추천용 토큰 역색인 (BM25) - 에이전트당 한 번
+        self.ranker = RestaurantRanker(rest_df)
+
+    def _rank_by_distance(self, df, rows, geo, origin, col):
+        # rows(행 번호)를 origin(위도, 경도)에서 가까운 순으로 정렬하고 거리(m) 컬럼을 붙인다
+        if origin is None:
+            return df.iloc[rows]
+        dist = geo.distances(origin[0], origin[1], rows)
+        order = np.argsort(dist, kind="stable")
+        return df.iloc[rows[order]].assign(**{col: dist[order]})
+
+    def search_facility(self, user_query, origin=None):
+        # 입력값 소문자 변환 및 특수문자 제거
+        clean_query = re.sub(r'[^\w\s]', '', user_query).strip().lower()
+        tokens = clean_query.split()
+        target_keyword = None
+        
+        for token in tokens:
+            # 1. 동의어 사전 매칭 (영어/한글 모두)
+            if token in self.synonyms:
+                target_keyword = self.synonyms[token]
+                break
+            # 2. 데이터프레임 내 직접 매칭 (한글 검색용) - 색인 조회
+            term = self.fac_index.resolve_token(token)
+            if term is not None:
+                target_keyword = term
+                break
+        
+        search_term = target_keyword if target_keyword else clean_query
+        # '구분' 또는 '상세위치'에 search_term이 포함된 행 (origin이 있으면 거리순, 없으면 원래 순서)
+        rows = self.fac_index.lookup(search_term)
+        if not len(rows) and clean_query:
+            # 3. 정확히 맞는 게 없으면 오타/자모 유사도로 가장 가까운 시설명/위치/동의어
+            fuzzy = self.fac_index.fuzzy_term(tokens + ([clean_query] if len(tokens) > 1 else []))
+            if fuzzy is not None:
+                search_term, fields = fuzzy
+                rows = self.fac_index.lookup(search_term, fields)
+        results = self._rank_by_distance(self.fac_df, rows, self.fac_geo, origin, '거리')
+        return results, search_term
+
+    def nearest_facility(self, keyword, origin, k=5, radius_m=None):
+        """origin에서 가장 가까운 keyword 시설 k개 (예: KSPO DOME 근처 화장실)."""
+        rows = self.fac_index.lookup(self.synonyms.get(keyword, keyword))
+        mask = np.zeros(len(self.fac_df), dtype=bool)
+        mask[rows] = True
+        if radius_m is None:
+            ids, dist = self.fac_geo.knn(origin[0], origin[1], k, mask=mask)
+        else:
+            ids, dist = self.fac_geo.radius(origin[0], origin[1], radius_m, mask=mask)
+            ids, dist = ids[:k], dist[:k]
+        return self.fac_df.iloc[ids].assign(거리=dist)
+
+    def facilities_within(self, origin, radius_m):
+        """origin 반경 radius_m 이내의 모든 시설 (가까운 순)."""
+        ids, dist = self.fac_geo.radius(origin[0], origin[1], radius_m)
+        return self.fac_df.iloc[ids].assign(거리=dist)
+
+    def recommend_place(self, user_query, origin=None, k=None, crowd_fn=None):
+        """BM25 + 의도 가중치 점수를 거리(/혼잡도)와 섞은 순서로 맛집을 돌려준다 ('score' 컬럼, origin이 있으면 'distance').
+        k가 있으면 상위 k개만, crowd_fn(lats, lons)가 있으면 'crowd' 컬럼도 붙인다."""
+        rows, score, dist, crowd = self.ranker.rank(user_query, origin, k, crowd_fn)
+        extra = {'score': score}
+        if dist is not None:
+            extra['distance'] = dist
+        if crowd is not None:
+            extra['crowd'] = crowd
+        return self.rest_df.iloc[rows].assign(**extra)
+
+@lru_cache(maxsize=1)
+def get_agent():
+    df_fac, _, _, df_rest, fac_index, fac_geo, rest_geo = load_data()
+    return SmartAgent(df_fac, df_rest, fac_index, fac_geo, rest_geo)
+
+@lru_cache(maxsize=1)
+def get_walk_graph():
+    # 보행 그래프 + 공연장별 최단 경로 트리 (프로세스당 한 번)
+    return WalkingGraph(load_data()[0], VENUE_LOCATIONS)
+
+@lru_cache(maxsize=8)
+def _crowd_model(concerts_key, today):
+    _, users, food = load_data()[:3]
+    concerts = [{"title": t, "date": d, "place": p} for t, d, p in concerts_key]
+    return CrowdModel(concerts, food, users, VENUE_LOCATIONS, today=today)
+
+def get_crowd_model(concerts, today=None):
+    # 공연장 x 날짜 x 시간대 혼잡 점수표 (공연 목록이 바뀌거나 날짜가 넘어갈 때만 다시 계산)
+    return _crowd_model(tuple((c['title'], c['date'], c['place']) for c in concerts), today or date.today())
+
+# ==========================================
+# API & Utils
+# ==========================================
+# OLYMATE_WEATHER_URL로 로컬 스텁(kma_stub.py)을 가리킬 수 있다
+WEATHER_URL = os.environ.get("OLYMATE_WEATHER_URL", "http://apis.data.go.kr/1360000/VilageFcstInfoService_2.0/getVilageFcst")
+
+def forecast_base(now=None):
+    """현재 시각 기준으로 조회할 단기예보 발표 시각 (base_date, base_time)."""
+    now = now or datetime.now()
+    if now.minute < 45: now = now - timedelta(hours=1)
+    times = [2, 5, 8, 11, 14, 17, 20, 23]
+    base_hour = max([t for t in times if t <= now.hour] or [23])
+    base_date = now.strftime("%Y%m%d")
+    base_time = f"{base_hour:02d}00"
+    if now.hour < 2:
+        yesterday = now - timedelta(days=1)
+        base_date = yesterday.strftime("%Y%m%d")
+        base_time = "2300"
+    return base_date, base_time
+
+def forecast_expiry(base_date, base_time):
+    # 다음 예보(3시간 뒤)가 조회 가능해지는 시각까지 유효
+    issued = datetime.strptime(base_date + base_time, "%Y%m%d%H%M")
+    return (issued + timedelta(hours=3, minutes=45)).timestamp()
+
+@lru_cache(maxsize=1)
+def get_http():
+    # 연결을 재사용하는 공용 세션 (외부 API 호출은 모두 이 세션으로)
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=32)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+@lru_cache(maxsize=1)
+def get_fetch_pool():
+    # 원격 데이터 병렬 조회용 워커 풀 (첫 화면이 느린 API를 기다리지 않도록)
+    return ThreadPoolExecutor(max_workers=8, thread_name_prefix="olymate-fetch")
+
+@lru_cache(maxsize=1)
+def get_profiler():
+    # 구간별 계측 (프로세스 공용). OLYMATE_METRICS_PORT가 있으면 /metrics도 띄운다
+    profiler = Profiler(enabled=profiling_enabled())
+    port = os.environ.get("OLYMATE_METRICS_PORT")
+    if port:
+        serve_metrics(profiler, int(port))
+    return profiler
+
+@lru_cache(maxsize=1)
+def get_weather_cache():
+    # 모든 세션이 공유하는 프로세스 단위 캐시
+    return ForecastCache()
+
+def fetch_forecast(key, http=None, api_key=None):
+    """발표분 단기예보 격자 전체를 병렬 페이지로 받아 (날짜, 시, 카테고리) 표로."""
+    base_date, base_time, nx, ny = key
+    api_key = api_key or os.environ.get("WEATHER_API_KEY")
+    params = {"serviceKey": api_key, "dataType": "JSON", "base_date": base_date, "base_time": base_time, "nx": nx, "ny": ny}
+    items = fetch_items(http or get_http(), WEATHER_URL, params)
+    if not items:
+        raise ValueError("empty forecast")
+    return ForecastTable.from_items(items, base_date, base_time)
+
+def get_forecast(cache=None, http=None, api_key=None):
+    # 다음 발표 전까지 모든 세션이 같은 표를 쓴다 (실패/갱신 중에는 직전 발표분)
+    cache = cache or get_weather_cache()
+    base_date, base_time = forecast_base()
+    key = (base_date, base_time, NX, NY)
+    return cache.get(key, lambda k: fetch_forecast(k, http, api_key), forecast_expiry(base_date, base_time))
+
+def weather_at(table, when=None):
+    """표에서 when(datetime) 시각의 요약 {"TMP", "SKY", "POP", "date", "hour"}.
+    when이 없으면 지금 이후 첫 예보 시각. 표가 없거나 예보 범위 밖이면 None."""
+    if table is None:
+        return None
+    if when is None:
+        slot = table.first_after(datetime.now())
+        return table.summary(*slot) if slot else None
+    return table.summary(when.date(), when.hour)
+
+def get_weather(cache=None, http=None, api_key=None, when=None):
+    return weather_at(get_forecast(cache, http, api_key), when)
+
+# 공연 목록: 저장소에 들어 있는 스냅샷(읽기 전용 씨앗)을 바로 쓰고, KSPO API는 OLYMATE_CONCERT_URL이 있을 때만 증분 동기화.
+# 동기화 결과는 git에 없는 캐시 폴더(.olymate_cache/)에 쓰고 다음 시작 때 씨앗보다 먼저 읽는다.
+CONCERT_URL = os.environ.get("OLYMATE_CONCERT_URL")
+CONCERT_SEED = os.environ.get("OLYMATE_CONCERT_SEED", os.path.join(DATA_DIR, "concerts_snapshot.json"))
+CONCERT_SNAPSHOT = os.environ.get("OLYMATE_CONCERT_SNAPSHOT") or os.path.join(cache_root(), "concerts_snapshot.json")
+
+@lru_cache(maxsize=1)
+def get_concert_store():
+    return ConcertStore(CONCERT_SNAPSHOT, venue_key, VENUE_LOCATIONS, url=CONCERT_URL,
+                        api_key=os.environ.get("CONCERT_API_KEY"), seed_path=CONCERT_SEED)
+
+def get_concert_catalog(api_key=None):
+    """정규화된 공연 목록 + 구간 색인. 동기화할 때가 되면 백그라운드에서 갱신한다."""
+    store = get_concert_store()
+    if api_key:
+        store.api_key = api_key
+    if store.due():
+        get_fetch_pool().submit(store.sync, get_http())
+    return store.catalog
+
+def get_concert_list(api_key=None):
+    return get_concert_catalog(api_key).concerts
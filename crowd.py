@@ -0,0 +1,186 @@
+import re
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from spatial import haversine_m
+
+# ==========================================
+# 혼잡도 예측 엔진
+# ==========================================
+# 공연 일정(공연장 수용 인원, 겹치는 공연, 요일)과 파크텔 식음료/방문객 통계를 합쳐
+# 공연장 x 날짜 x 시간대 혼잡 점수(0~100) 표를 한 번에 계산해 둔다.
+# 모든 계산은 (공연, 날짜, 시간) 배열 브로드캐스팅으로 처리하고, 조회는 배열 인덱싱뿐이다.
+
+VENUE_CAPACITY = {
+    "KSPO DOME": 15000,
+    "핸드볼경기장": 5000,
+    "올림픽홀": 2400,
+    "우리금융아트홀": 1200,
+}
+VENUE_ALIASES = {"올림픽체조경기장": "KSPO DOME"}
+REFERENCE_CROWD = 20000          # 이 인원이 한꺼번에 몰리면 100점
+HOURS = np.arange(10, 24)        # 10시 ~ 23시 시간대
+SHOW_HOURS = 3                   # 공연 길이(시간)
+DOW_FACTOR = np.array([0.8, 0.8, 0.85, 0.9, 1.0, 1.2, 1.15])   # 월~일
+SPILLOVER = 0.35                 # 다른 공연장 인파가 주변에 미치는 비율
+CROWD_LEVELS = [(30, "여유"), (60, "보통"), (101, "혼잡")]
+
+
+def parse_date_range(text):
+    """'2025-12-05 ~ 07', '2025-12-06 ~ 01-25', '2025-12-06 ~ 2025-12-07' 같은 문자열을 (시작일, 종료일)로."""
+    parts = [p.strip() for p in text.split("~")]
+    start = datetime.strptime(parts[0], "%Y-%m-%d").date()
+    if len(parts) < 2 or not parts[1]:
+        return start, start
+    nums = [int(n) for n in re.findall(r"\d+", parts[1])]
+    if len(nums) >= 3:
+        end = date(nums[0], nums[1], nums[2])
+    elif len(nums) == 2:
+        end = date(start.year, nums[0], nums[1])
+        if end < start:
+            end = date(start.year + 1, nums[0], nums[1])
+    else:
+        end = start.replace(day=nums[0])
+    return start, end
+
+
+def show_start_hour(weekday):
+    # 주말 공연은 오후 5시, 평일은 오후 7시 시작으로 가정
+    return 17 if weekday >= 5 else 19
+
+
+def resolve_venue(place):
+    for alias, venue in VENUE_ALIASES.items():
+        if alias in place:
+            return venue
+    for venue in VENUE_CAPACITY:
+        if venue in place:
+            return venue
+    return None
+
+
+def crowd_level(score):
+    for limit, label in CROWD_LEVELS:
+        if score < limit:
+            return label
+    return CROWD_LEVELS[-1][1]
+
+
+def crowd_rank(scores):
+    """점수(배열)를 혼잡 단계 번호로 (0=여유, 1=보통, 2=혼잡)."""
+    return np.searchsorted([limit for limit, _ in CROWD_LEVELS[:-1]], scores, side="right")
+
+
+def _show_profile(start_hours):
+    """날짜별 공연 시작 시각(D,)에 대해 시간대별 인파 비율(D, H)."""
+    offset = HOURS[None, :] - start_hours[:, None]
+    profile = np.zeros(offset.shape)
+    profile[offset == -3] = 0.25          # 입장 대기 시작
+    profile[offset == -2] = 0.6
+    profile[offset == -1] = 1.0           # 입장 직전 최대
+    profile[(offset >= 0) & (offset < SHOW_HOURS)] = 0.15   # 공연 중 (대부분 실내)
+    profile[offset == SHOW_HOURS] = 0.9   # 퇴장 직후
+    profile[offset == SHOW_HOURS + 1] = 0.4
+    return profile
+
+
+def _base_demand(food_df, users_df):
+    """파크텔 통계로 시간대별 기본 식음료 수요(H,)와 방문객 추세 계수."""
+    meal = np.exp(-0.5 * ((HOURS - 12.5) / 1.0) ** 2) + np.exp(-0.5 * ((HOURS - 18.5) / 1.2) ** 2)
+    cafe = np.exp(-0.5 * ((HOURS - 15.0) / 2.5) ** 2)
+    meal_share, trend = 0.5, 1.0
+    if not food_df.empty and {"한식당", "커피숍"} <= set(food_df.columns):
+        recent = food_df[["한식당", "커피숍"]].apply(pd.to_numeric, errors="coerce").tail(5).sum()
+        if recent.sum() > 0:
+            meal_share = float(recent["한식당"] / recent.sum())
+    if not users_df.empty and "합계" in users_df.columns:
+        total = pd.to_numeric(users_df["합계"], errors="coerce").dropna()
+        if len(total) >= 2 and total.mean() > 0:
+            trend = float(np.clip(total.tail(3).mean() / total.mean(), 0.7, 1.3))
+    base = meal_share * meal + (1 - meal_share) * cafe
+    return 10.0 * trend * base / base.max(), meal_share, trend
+
+
+class CrowdModel:
+    def __init__(self, concerts, food_df, users_df, venue_locations, horizon_days=120, today=None):
+        self.venues = list(VENUE_CAPACITY)
+        self.venue_coords = np.array([venue_locations.get(v, venue_locations.get("올림픽공원")) for v in self.venues], dtype=np.float64)
+        today = today or date.today()
+
+        parsed = []
+        for c in concerts:
+            venue = resolve_venue(c["place"])
+            try:
+                start, end = parse_date_range(c["date"])
+            except ValueError:
+                continue
+            if venue is not None:
+                parsed.append((self.venues.index(venue), start, end))
+        first = min([today] + [p[1] for p in parsed])
+        last = max([today + timedelta(days=horizon_days)] + [p[2] for p in parsed])
+        self.start_date = first
+        self.dates = pd.date_range(first, last, freq="D")
+        n_days = len(self.dates)
+
+        # (공연, 날짜) 진행 여부 -> (공연, 날짜, 시간) 인파 -> 공연장별 합산
+        day_idx = np.arange(n_days)
+        c_venue = np.array([p[0] for p in parsed], dtype=np.int64)
+        c_start = np.array([(p[1] - first).days for p in parsed], dtype=np.int64)
+        c_end = np.array([(p[2] - first).days for p in parsed], dtype=np.int64)
+        active = (day_idx[None, :] >= c_start[:, None]) & (day_idx[None, :] <= c_end[:, None])
+        weekday = self.dates.weekday.to_numpy()
+        profile = _show_profile(np.array([show_start_hour(w) for w in weekday]))
+        capacity = np.array([VENUE_CAPACITY[v] for v in self.venues], dtype=np.float64)
+        people = active[:, :, None] * capacity[c_venue][:, None, None] * DOW_FACTOR[weekday][None, :, None] * profile[None, :, :]
+        own = np.zeros((len(self.venues), n_days, len(HOURS)))
+        np.add.at(own, c_venue, people)
+
+        # 겹치는 공연: 다른 공연장 인파의 일부가 주변 동선/식당가로 번진다
+        spill = SPILLOVER * (own.sum(axis=0, keepdims=True) - own)
+        base, self.meal_share, self.trend = _base_demand(food_df, users_df)
+        self.n_shows = active.sum(axis=0)
+        self.scores = np.clip(100.0 * (own + spill) / REFERENCE_CROWD + base[None, None, :], 0, 100).astype(np.float32)
+
+    # --- 조회 ---
+    def _slot(self, day, hour):
+        d = (pd.Timestamp(day).date() - self.start_date).days
+        h = int(np.clip(hour, HOURS[0], HOURS[-1]) - HOURS[0])
+        if d < 0 or d >= len(self.dates):
+            return None, h
+        return d, h
+
+    def venue_scores(self, day, hour):
+        """공연장별 점수 (venues 순서). 범위를 벗어나면 0."""
+        d, h = self._slot(day, hour)
+        return self.scores[:, d, h] if d is not None else np.zeros(len(self.venues), dtype=np.float32)
+
+    def venue_score(self, venue, day, hour):
+        venue = resolve_venue(venue) or venue
+        if venue not in self.venues:
+            return 0.0
+        return float(self.venue_scores(day, hour)[self.venues.index(venue)])
+
+    def point_scores(self, lats, lons, day, hour, decay_m=400.0):
+        """임의 지점들(예: 식당)의 혼잡 점수 - 공연장 점수를 거리로 감쇠해 합산."""
+        dist = haversine_m(np.asarray(lats, dtype=np.float64)[:, None], np.asarray(lons, dtype=np.float64)[:, None],
+                           self.venue_coords[None, :, 0], self.venue_coords[None, :, 1])
+        weights = np.exp(-dist / decay_m)
+        return np.clip(weights @ self.venue_scores(day, hour), 0, 100)
+
+    def day_table(self, day):
+        """하루치 공연장 x 시간대 점수표 (DataFrame, index=시간)."""
+        d, _ = self._slot(day, HOURS[0])
+        values = self.scores[:, d, :].T if d is not None else np.zeros((len(HOURS), len(self.venues)))
+        return pd.DataFrame(values, index=pd.Index(HOURS, name="시간"), columns=self.venues)
+
+    def table(self):
+        """전체 공연장 x 날짜 x 시간대 점수 (long format)."""
+        v, d, h = np.meshgrid(np.arange(len(self.venues)), np.arange(len(self.dates)), np.arange(len(HOURS)), indexing="ij")
+        return pd.DataFrame({
+            "venue": np.array(self.venues)[v.ravel()],
+            "date": self.dates[d.ravel()],
+            "hour": HOURS[h.ravel()],
+            "score": self.scores.ravel(),
+        })
@@ -0,0 +1,262 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+# ==========================================
+# CSV -> 열 단위 바이너리 캐시 (memory-mapped NumPy)
+# ==========================================
+# - 표마다 <cache_dir>/<표>-<CSV sha256 앞 16자리>/ 에 열별 .npy와 manifest.json을 쓴다.
+#   CSV 내용이 바뀌면 해시가 달라져 새 디렉터리를 만들므로 낡은 캐시를 읽을 일이 없다.
+# - 문자열 열은 사전 인코딩(코드 배열 + 고유값 목록), category 열은 그대로 pd.Categorical로,
+#   좌표는 float64 그대로 저장한다 (float32면 37.522가 37.52199935913086으로 API/화면에 새어 나간다).
+#   숫자/코드 배열은 np.load(mmap_mode='r')로 열기 때문에 여러 워커 프로세스가 같은 파일을 페이지 캐시에서 공유한다.
+# - manifest의 스키마(열 이름/종류/행 수/dtype)가 SCHEMAS와 다르면 캐시를 버리고 다시 만든다.
+# - 전처리: python data_cache.py (배포 시 한 번). 캐시가 없거나 낡으면 load_table()이 알아서 만든다.
+# - 캐시 폴더를 만들거나 쓸 수 없으면 (읽기 전용 배포) 같은 스키마 변환을 거친 CSV를 메모리에서 바로 쓴다.
+
+SCHEMA_VERSION = 1
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CACHE_DIR = os.environ.get("OLYMATE_CACHE_DIR") or None   # None이면 <data_dir>/.olymate_cache
+
+SCHEMAS = {
+    "facilities": {"source": "facilities.csv", "columns": {
+        "순번": "int32", "구분": "category", "위치": "category", "상세위치": "str",
+        "위도": "float64", "경도": "float64", "비고": "str"}},
+    "restaurants": {"source": "restaurants.csv", "columns": {
+        "name": "str", "category": "category", "desc": "str", "lat": "float64", "lon": "float64"}},
+    "parktel_users": {"source": "parktel_users.csv", "columns": {
+        "구분": "int32", "합계": "int64", "일반내국인": "int64", "일반외국인": "int64",
+        "청소년내국인": "int64", "청소년외국인": "int64"}},
+    "parktel_food": {"source": "parktel_food.csv", "columns": {
+        "구분": "int32", "합계": "int64", "연회장": "int64", "커피숍": "int64", "한식당": "int64"}},
+}
+TEXT_KINDS = ("category", "str")
+
+
+class CacheError(ValueError):
+    pass
+
+
+def _code_dtype(n_values):
+    # pd.Categorical이 쓰는 코드 dtype과 맞춰 두면 from_codes가 배열을 복사하지 않는다
+    for dtype in (np.int8, np.int16, np.int32):
+        if n_values < np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+
+def file_sha256(path, chunk=1 << 20):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def has_source(name, data_dir=DATA_DIR):
+    return os.path.exists(os.path.join(data_dir, SCHEMAS[name]["source"]))
+
+
+def cache_root(data_dir=DATA_DIR, cache_dir=None):
+    return cache_dir or DEFAULT_CACHE_DIR or os.path.join(data_dir, ".olymate_cache")
+
+
+def source_hash(name, data_dir=DATA_DIR, cache_dir=None):
+    """원본 CSV의 sha256. 크기/수정 시각이 지난번과 같으면 저장해 둔 값을 쓴다."""
+    src = os.path.join(data_dir, SCHEMAS[name]["source"])
+    st = os.stat(src)
+    stamp_path = os.path.join(cache_root(data_dir, cache_dir), f"{name}.stamp.json")
+    try:
+        with open(stamp_path, encoding="utf-8") as f:
+            stamp = json.load(f)
+        if stamp["size"] == st.st_size and stamp["mtime_ns"] == st.st_mtime_ns:
+            return stamp["sha256"]
+    except (OSError, ValueError, KeyError):
+        pass
+    digest = file_sha256(src)
+    try:
+        os.makedirs(os.path.dirname(stamp_path), exist_ok=True)
+        _write_json(stamp_path, {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": digest})
+    except OSError:
+        pass    # 읽기 전용 배포: 매번 해시만 다시 계산
+    return digest
+
+
+def _write_json(path, obj):
+    # 임시 파일에 쓰고 rename해서 다른 프로세스가 반쯤 쓴 파일을 읽지 않게 한다
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-", suffix=".json")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(obj, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def _table_dir(name, digest, data_dir, cache_dir):
+    return os.path.join(cache_root(data_dir, cache_dir), f"{name}-{digest[:16]}")
+
+
+# --- 만들기 ---
+def _encode_frame(name, df):
+    """DataFrame을 스키마대로 {열: (종류, 배열, 고유값 목록|None)}으로. 맞지 않으면 CacheError."""
+    spec = SCHEMAS[name]["columns"]
+    missing = [c for c in spec if c not in df.columns]
+    if missing:
+        raise CacheError(f"{name}: missing columns {missing}")
+    encoded = {}
+    for col, kind in spec.items():
+        if kind in TEXT_KINDS:
+            values = df[col].fillna("").astype(str)
+            codes, uniques = pd.factorize(values, sort=kind == "category")
+            encoded[col] = (kind, codes.astype(_code_dtype(len(uniques))), [str(u) for u in uniques])
+            continue
+        try:
+            numbers = pd.to_numeric(df[col], errors="raise")
+        except (ValueError, TypeError) as e:
+            raise CacheError(f"{name}.{col}: not numeric ({e})")
+        if kind.startswith("int") and numbers.isna().any():
+            raise CacheError(f"{name}.{col}: empty values in integer column")
+        encoded[col] = (kind, numbers.to_numpy(dtype=kind), None)
+    return encoded
+
+
+def _read_source(name, data_dir):
+    return _encode_frame(name, pd.read_csv(os.path.join(data_dir, SCHEMAS[name]["source"])))
+
+
+def _decode_frame(encoded):
+    """_encode_frame 결과 -> _open_table과 같은 모양의 DataFrame (캐시를 쓸 수 없을 때)."""
+    data = {}
+    for col, (kind, array, values) in encoded.items():
+        if kind == "category":
+            data[col] = pd.Categorical.from_codes(array, categories=values, validate=False)
+        elif kind in TEXT_KINDS:
+            data[col] = np.asarray(values, dtype=object)[array] if values else np.full(len(array), "", dtype=object)
+        else:
+            data[col] = array
+    return pd.DataFrame(data, copy=False)
+
+
+def build_table(name, data_dir=DATA_DIR, cache_dir=None, digest=None, encoded=None):
+    """CSV를 읽어 캐시 디렉터리를 만들고 그 경로를 돌려준다. 이미 있으면 그대로 둔다.
+    캐시 폴더를 만들거나 쓸 수 없으면 OSError."""
+    digest = digest or source_hash(name, data_dir, cache_dir)
+    final = _table_dir(name, digest, data_dir, cache_dir)
+    encoded = encoded if encoded is not None else _read_source(name, data_dir)
+    rows = len(next(iter(encoded.values()))[1])
+
+    root = os.path.dirname(final)
+    os.makedirs(root, exist_ok=True)
+    tmp = tempfile.mkdtemp(dir=root, prefix=f".{name}-")
+    columns = {}
+    for i, (col, (kind, array, values)) in enumerate(encoded.items()):
+        np.save(os.path.join(tmp, f"c{i}.npy"), array)
+        columns[col] = {"kind": kind, "file": f"c{i}.npy", "dtype": array.dtype.str}
+        if values is not None:
+            columns[col]["values"] = f"c{i}.json"
+            with open(os.path.join(tmp, f"c{i}.json"), "w", encoding="utf-8") as f:
+                json.dump(values, f, ensure_ascii=False)
+    # manifest는 맨 마지막에: manifest가 있으면 디렉터리가 완성된 것
+    with open(os.path.join(tmp, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump({"schema_version": SCHEMA_VERSION, "table": name, "source": SCHEMAS[name]["source"],
+                   "sha256": digest, "rows": rows, "columns": columns}, f, ensure_ascii=False, indent=1)
+    try:
+        os.rename(tmp, final)
+    except OSError:
+        # 다른 프로세스가 먼저 만들었다
+        shutil.rmtree(tmp, ignore_errors=True)
+    _prune(name, final)
+    return final
+
+
+def _prune(name, keep):
+    # 같은 표의 예전 캐시 정리 (이미 mmap한 프로세스는 파일이 지워져도 계속 읽을 수 있다)
+    root = os.path.dirname(keep)
+    for entry in os.listdir(root):
+        path = os.path.join(root, entry)
+        if entry.startswith(f"{name}-") and path != keep and os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+
+
+# --- 읽기 ---
+def _open_table(name, path):
+    """manifest를 SCHEMAS와 대조하고 열들을 mmap으로 연다. 맞지 않으면 CacheError."""
+    try:
+        with open(os.path.join(path, "manifest.json"), encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        raise CacheError(f"{name}: unreadable manifest ({e})")
+    spec = SCHEMAS[name]["columns"]
+    if manifest.get("schema_version") != SCHEMA_VERSION:
+        raise CacheError(f"{name}: schema version {manifest.get('schema_version')} != {SCHEMA_VERSION}")
+    stored = {col: meta.get("kind") for col, meta in manifest.get("columns", {}).items()}
+    if stored != spec or list(stored) != list(spec):
+        raise CacheError(f"{name}: cached columns {stored} do not match schema")
+
+    rows = manifest["rows"]
+    data = {}
+    for col, meta in manifest["columns"].items():
+        try:
+            array = np.load(os.path.join(path, meta["file"]), mmap_mode="r")
+        except (OSError, ValueError) as e:
+            raise CacheError(f"{name}.{col}: {e}")
+        if array.shape != (rows,) or array.dtype.str != meta["dtype"]:
+            raise CacheError(f"{name}.{col}: shape/dtype {array.shape} {array.dtype.str} does not match manifest")
+        if meta["kind"] in TEXT_KINDS:
+            with open(os.path.join(path, meta["values"]), encoding="utf-8") as f:
+                values = json.load(f)
+            if rows and int(array.max()) >= len(values):
+                raise CacheError(f"{name}.{col}: code out of range")
+            if meta["kind"] == "category":
+                data[col] = pd.Categorical.from_codes(array, categories=values, validate=False)
+            else:
+                data[col] = np.asarray(values, dtype=object)[array] if values else np.full(rows, "", dtype=object)
+        else:
+            data[col] = array
+    return pd.DataFrame(data, copy=False)
+
+
+def load_table(name, data_dir=DATA_DIR, cache_dir=None, rebuild=True):
+    """캐시에서 표를 읽는다. 캐시가 없거나 스키마/해시가 맞지 않으면 CSV에서 다시 만든다.
+    원본 CSV가 없을 때만 FileNotFoundError (캐시를 쓸 수 없으면 CSV를 메모리에서 변환해 돌려준다)."""
+    digest = source_hash(name, data_dir, cache_dir)
+    path = _table_dir(name, digest, data_dir, cache_dir)
+    try:
+        return _open_table(name, path)
+    except CacheError:
+        if not rebuild:
+            raise
+    shutil.rmtree(path, ignore_errors=True)
+    encoded = _read_source(name, data_dir)
+    try:
+        return _open_table(name, build_table(name, data_dir, cache_dir, digest, encoded))
+    except OSError:
+        # 캐시 폴더가 없고 만들 수도 없거나 읽기 전용: 캐시 없이 같은 스키마로
+        return _decode_frame(encoded)
+
+
+def build_all(data_dir=DATA_DIR, cache_dir=None):
+    """전처리 단계: 원본이 있는 모든 표의 캐시를 만든다. {표: 캐시 경로}."""
+    built = {}
+    for name in SCHEMAS:
+        if has_source(name, data_dir):
+            load_table(name, data_dir, cache_dir)
+            built[name] = _table_dir(name, source_hash(name, data_dir, cache_dir), data_dir, cache_dir)
+    return built
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="CSV -> memory-mapped 열 캐시 전처리")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--cache-dir", default=None)
+    args = parser.parse_args()
+    t0 = time.perf_counter()
+    for table, path in build_all(args.data_dir, args.cache_dir).items():
+        print(f"{table:<14} -> {path}")
+    print(f"done in {time.perf_counter() - t0:.2f}s")
@@ -0,0 +1,172 @@
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import deque
+
+# ==========================================
+# 팬 존 메시지 저장소 (SQLite WAL + 최근 메시지 링 버퍼)
+# ==========================================
+# - post()는 큐에 넣고 바로 돌아온다. 쓰기 스레드가 모아서 한 트랜잭션으로 기록한다.
+# - 최근 ring_size개는 메모리 링 버퍼에서 바로 읽고, 그보다 오래된 페이지만 DB를 조회한다.
+# - 페이지는 id 커서 기반 (id < cursor ORDER BY id DESC) 이라 OFFSET 스캔이 없다.
+# - 여러 프로세스가 같은 DB 파일을 쓰면 sync_interval마다 새 행을 링 버퍼로 가져온다.
+# - 기록에 실패한 배치는 큐 맨 앞에 둔 채 간격을 늘려 가며 다시 시도한다 (순서와 _pending이 DB와 어긋나지 않게).
+# - SQLite 조회는 _lock 밖에서(_read_lock) 하고 _lock은 결과를 바꿔 넣을 때만 잡아 post()를 막지 않는다.
+
+DEFAULT_DB_PATH = os.environ.get("OLYMATE_FAN_DB", "fan_messages.db")
+SEED_MESSAGES = ["god 오빠들 화이팅!", "성시경 목소리 녹는다.."]
+
+
+class FanMessageStore:
+    def __init__(self, path=DEFAULT_DB_PATH, ring_size=500, batch_size=256, flush_interval=0.05,
+                 sync_interval=1.0, max_length=300, seed=SEED_MESSAGES, retry_interval=0.05, max_retry_interval=2.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.sync_interval = sync_interval
+        self.max_length = max_length
+        self.retry_interval = retry_interval
+        self.max_retry_interval = max_retry_interval
+        self._lock = threading.Lock()
+        self._read_lock = threading.Lock()     # 읽기 연결 하나를 여러 스레드가 나눠 쓴다
+        self._ring = deque(maxlen=ring_size)   # (id, body, created_at), id 오름차순
+        self._pending = deque()                # 아직 기록되지 않은 (body, created_at)
+        self._queue = queue.Queue()
+        self._last_sync = 0.0
+        self._closed = False
+
+        self._read = self._connect()
+        with self._read:
+            self._read.execute("CREATE TABLE IF NOT EXISTS fan_messages ("
+                               "id INTEGER PRIMARY KEY AUTOINCREMENT, body TEXT NOT NULL, created_at REAL NOT NULL)")
+            if seed and self._read.execute("SELECT 1 FROM fan_messages LIMIT 1").fetchone() is None:
+                # 처음 만든 DB에만 기본 메시지를 넣는다 (오래된 것부터)
+                now = time.time()
+                self._read.executemany("INSERT INTO fan_messages (body, created_at) VALUES (?, ?)",
+                                       [(body, now) for body in reversed(seed)])
+        self._sync(force=True)
+
+        self._writer = threading.Thread(target=self._write_loop, name="fan-store-writer", daemon=True)
+        self._writer.start()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    # --- 쓰기 ---
+    def post(self, body):
+        body = body.strip()[:self.max_length]
+        if not body:
+            return False
+        item = (body, time.time())
+        with self._lock:
+            self._pending.append(item)
+            self._queue.put(item)
+        return True
+
+    def _write_loop(self):
+        conn = self._connect()
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    nxt = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if nxt is None:
+                    self._closed = True
+                    break
+                batch.append(nxt)
+            # 같은 배치를 성공할 때까지 다시 시도한다 (뒤로 돌리면 실패 중에 올라온 글과 순서가 바뀐다)
+            delay = self.retry_interval
+            while True:
+                try:
+                    with conn:
+                        conn.executemany("INSERT INTO fan_messages (body, created_at) VALUES (?, ?)", batch)
+                    break
+                except sqlite3.Error:
+                    time.sleep(delay)
+                    delay = min(delay * 2, self.max_retry_interval)
+            with self._lock:
+                for _ in batch:
+                    self._pending.popleft()
+            self._sync(force=True)
+            if self._closed:
+                break
+        conn.close()
+
+    def flush(self, timeout=5.0):
+        """대기 중인 메시지가 모두 기록될 때까지 기다린다 (테스트/종료용)."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            with self._lock:
+                if not self._pending:
+                    return True
+            time.sleep(0.01)
+        return False
+
+    def close(self):
+        self._queue.put(None)
+        self._writer.join(timeout=5)
+        with self._read_lock:
+            self._read.close()
+
+    # --- 읽기 ---
+    def _sync(self, force=False):
+        now = time.monotonic()
+        if not force and now - self._last_sync < self.sync_interval:
+            return
+        with self._lock:
+            last_id = self._ring[-1][0] if self._ring else 0
+        with self._read_lock:
+            rows = self._read.execute(
+                "SELECT id, body, created_at FROM fan_messages WHERE id > ? ORDER BY id DESC LIMIT ?",
+                (last_id, self._ring.maxlen)).fetchall()
+        with self._lock:
+            # 조회하는 동안 다른 스레드가 먼저 가져온 행은 건너뛴다
+            last_id = self._ring[-1][0] if self._ring else 0
+            self._ring.extend(r for r in reversed(rows) if r[0] > last_id)
+            self._last_sync = now
+
+    def latest(self, limit=20):
+        """최신 메시지 limit개 (최신순)와 다음 페이지 커서."""
+        self._sync()
+        with self._lock:
+            pending = [{"id": None, "body": b, "created_at": t} for b, t in reversed(self._pending)]
+            recent = [{"id": i, "body": b, "created_at": t} for i, b, t in reversed(self._ring)]
+            newest_id = self._ring[-1][0] if self._ring else None
+        messages = (pending + recent)[:limit]
+        if len(messages) < limit:
+            return messages, None
+        ids = [m["id"] for m in messages if m["id"] is not None]
+        # 첫 페이지가 전부 미기록 메시지면 링 버퍼의 최신 메시지부터 이어서 본다
+        cursor = min(ids) if ids else (newest_id + 1 if newest_id is not None else None)
+        return messages, cursor
+
+    def older(self, before, limit=20):
+        """id < before 인 메시지 limit개 (최신순)와 다음 커서. 더 없으면 커서는 None."""
+        with self._lock:
+            if self._ring and self._ring[0][0] < before:
+                # 링 버퍼 범위 안이면 DB 조회 없이
+                rows = [r for r in reversed(self._ring) if r[0] < before][:limit]
+                if len(rows) == limit:
+                    return self._page(rows, limit)
+        with self._read_lock:
+            rows = self._read.execute(
+                "SELECT id, body, created_at FROM fan_messages WHERE id < ? ORDER BY id DESC LIMIT ?",
+                (before, limit)).fetchall()
+        return self._page(rows, limit)
+
+    @staticmethod
+    def _page(rows, limit):
+        messages = [{"id": i, "body": b, "created_at": t} for i, b, t in rows]
+        cursor = messages[-1]["id"] if len(messages) == limit else None
+        return messages, cursor
@@ -0,0 +1,129 @@
+import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import numpy as np
+
+# ==========================================
+# 단기예보 격자 전체 수집 -> (날짜, 시, 카테고리) 표
+# ==========================================
+# - 첫 페이지로 totalCount를 알아낸 뒤 나머지 페이지를 병렬로 받아 발표분 전체(약 3일 x 24시간 x 12종)를 모은다.
+# - 항목을 한 번만 해석해 values[날짜, 시, 카테고리] float32 배열(없는 칸은 NaN)로 만든다.
+#   "강수없음"/"1mm 미만"/"30.0~50.0mm" 같은 문자열도 숫자로 바꿔 둔다.
+# - 표 하나를 다음 발표 전까지 모든 세션이 공유하므로 (ForecastCache) 세션마다 API를 부르지 않고
+#   "공연 날 몇 시 기온" 같은 조회는 배열 인덱싱 한 번이다.
+
+PAGE_SIZE = 300
+MAX_PAGE_WORKERS = 4
+SKY_LABELS = {1: "맑음 ☀️", 3: "구름많음 ⛅", 4: "흐림 ☁️"}
+PTY_LABELS = {1: "비 🌧️", 2: "비/눈 🌨️", 3: "눈 ❄️", 4: "소나기 🌦️"}
+
+_NUMBER = re.compile(r"-?\d+(?:\.\d+)?")
+
+
+def parse_value(text):
+    """예보 값 문자열 -> 숫자. 강수/적설 없음은 0, 'N mm 미만'은 N/2, 범위는 아래 값."""
+    if isinstance(text, (int, float)):
+        return float(text)
+    text = str(text).strip()
+    if not text or text.endswith("없음"):
+        return 0.0
+    match = _NUMBER.search(text)
+    if match is None:
+        return float("nan")
+    value = float(match.group())
+    return value / 2 if "미만" in text else value
+
+
+class ForecastTable:
+    def __init__(self, base_date, base_time, start_day, categories, values):
+        self.base_date = base_date
+        self.base_time = base_time
+        self.start_day = start_day                  # values[0]의 날짜 (date)
+        self.categories = list(categories)
+        self.cat_index = {c: i for i, c in enumerate(self.categories)}
+        self.values = values                        # (날짜 수, 24, 카테고리 수) float32
+
+    @classmethod
+    def from_items(cls, items, base_date, base_time):
+        dates = sorted({it["fcstDate"] for it in items})
+        categories = sorted({it["category"] for it in items})
+        start = datetime.strptime(dates[0], "%Y%m%d").date() if dates else datetime.strptime(base_date, "%Y%m%d").date()
+        days = (datetime.strptime(dates[-1], "%Y%m%d").date() - start).days + 1 if dates else 0
+        values = np.full((days, 24, len(categories)), np.nan, dtype=np.float32)
+        cat_index = {c: i for i, c in enumerate(categories)}
+        for it in items:
+            d = (datetime.strptime(it["fcstDate"], "%Y%m%d").date() - start).days
+            values[d, int(it["fcstTime"][:2]), cat_index[it["category"]]] = parse_value(it["fcstValue"])
+        return cls(base_date, base_time, start, categories, values)
+
+    def __len__(self):
+        return int(np.isfinite(self.values).sum())
+
+    def covers(self, day, hour):
+        d = (day - self.start_day).days
+        return 0 <= d < len(self.values) and 0 <= hour < 24 and bool(np.isfinite(self.values[d, hour]).any())
+
+    def value(self, day, hour, category):
+        """(날짜, 시, 카테고리) 값. 예보 범위 밖이면 None."""
+        d = (day - self.start_day).days
+        c = self.cat_index.get(category)
+        if c is None or not 0 <= d < len(self.values) or not 0 <= hour < 24:
+            return None
+        v = self.values[d, hour, c]
+        return None if np.isnan(v) else float(v)
+
+    def at(self, day, hour):
+        """{카테고리: 값} (그 시각 예보가 없으면 None)."""
+        if not self.covers(day, hour):
+            return None
+        row = self.values[(day - self.start_day).days, hour]
+        return {c: float(row[i]) for i, c in enumerate(self.categories) if not np.isnan(row[i])}
+
+    def first_after(self, when):
+        """when 이후(그 시각 포함) 처음으로 예보가 있는 (날짜, 시). 없으면 None."""
+        t = when.replace(minute=0, second=0, microsecond=0)
+        end = datetime.combine(self.start_day, datetime.min.time()) + timedelta(days=len(self.values))
+        while t < end:
+            if self.covers(t.date(), t.hour):
+                return t.date(), t.hour
+            t += timedelta(hours=1)
+        return None
+
+    def summary(self, day, hour):
+        """화면용 요약 {"TMP", "SKY", "POP", "date", "hour"} (앱/API가 쓰는 형식). 없으면 None."""
+        row = self.at(day, hour)
+        if row is None:
+            return None
+        sky = SKY_LABELS.get(int(row["SKY"]), "-") if "SKY" in row else "-"
+        if row.get("PTY"):
+            sky = PTY_LABELS.get(int(row["PTY"]), sky)
+        return {
+            "TMP": f"{row['TMP']:.0f}" if "TMP" in row else "-",
+            "SKY": sky,
+            "POP": f"{row['POP']:.0f}" if "POP" in row else "-",
+            "date": day.isoformat(),
+            "hour": hour,
+        }
+
+
+def _fetch_page(http, url, params, page, page_size, timeout):
+    response = http.get(url, params=dict(params, pageNo=str(page), numOfRows=str(page_size)), timeout=timeout)
+    response.raise_for_status()
+    body = response.json()["response"]
+    if body["header"]["resultCode"] != "00":
+        raise ValueError(body["header"].get("resultMsg", "API error"))
+    return body["body"]
+
+
+def fetch_items(http, url, params, page_size=PAGE_SIZE, max_workers=MAX_PAGE_WORKERS, timeout=3):
+    """첫 페이지로 totalCount를 알아내고 나머지 페이지는 병렬로. 한 페이지라도 실패하면 예외."""
+    first = _fetch_page(http, url, params, 1, page_size, timeout)
+    items = list(first["items"]["item"] or [])
+    pages = -(-int(first.get("totalCount", len(items))) // page_size)
+    if pages > 1:
+        # 발표당 한 번이라 호출마다 작은 풀을 만든다 (공용 fetch 풀 안에서 불려도 교착이 없도록)
+        with ThreadPoolExecutor(max_workers=min(max_workers, pages - 1), thread_name_prefix="olymate-fcst") as pool:
+            for body in pool.map(lambda p: _fetch_page(http, url, params, p, page_size, timeout), range(2, pages + 1)):
+                items.extend(body["items"]["item"] or [])
+    return items
@@ -0,0 +1,108 @@
+import threading
+import time
+
+# ==========================================
+# 프로세스 공용 예보 캐시 (TTL + stale-while-revalidate)
+# ==========================================
+# - 키는 (base_date, base_time, nx, ny). 다음 예보가 발표되는 시각(expires_at)까지 유효하다.
+# - 새 키에 값이 없으면 같은 격자(nx, ny)의 직전 예보를 그대로 돌려주고 백그라운드에서 갱신한다.
+# - 직전 값도 없으면 한 스레드만 동기 호출하고 나머지는 그 결과를 기다린다.
+# - 실패하면 격자별로 지수 백오프하여 rerun마다 API를 두드리지 않는다.
+
+
+class _Entry:
+    __slots__ = ("value", "expires_at")
+
+    def __init__(self, value, expires_at):
+        self.value = value
+        self.expires_at = expires_at
+
+
+class ForecastCache:
+    def __init__(self, retry_base=15.0, retry_max=600.0, wait_timeout=5.0, clock=time.time):
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.wait_timeout = wait_timeout
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._entries = {}     # key -> _Entry
+        self._latest = {}      # slot -> 가장 최근에 성공한 key
+        self._inflight = {}    # key -> threading.Event
+        self._backoff = {}     # slot -> (연속 실패 횟수, 다음 시도 가능 시각)
+        self._stats = {"hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0,
+                       "failures": 0, "backoff_skips": 0, "upstream_calls": 0}
+
+    @staticmethod
+    def _slot(key):
+        return tuple(key[2:])
+
+    def _may_call(self, slot, now):
+        retry = self._backoff.get(slot)
+        return retry is None or now >= retry[1]
+
+    def get(self, key, loader, expires_at):
+        """key의 예보를 돌려준다. loader(key)는 실패 시 예외를 던져야 한다. 값이 없으면 None."""
+        now = self.clock()
+        slot = self._slot(key)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now < entry.expires_at:
+                self._stats["hits"] += 1
+                return entry.value
+
+            stale = entry or self._entries.get(self._latest.get(slot))
+            if stale is not None:
+                # 오래된 값을 먼저 주고 갱신은 백그라운드에서
+                self._stats["stale_hits"] += 1
+                if key not in self._inflight and self._may_call(slot, now):
+                    self._inflight[key] = threading.Event()
+                    self._stats["refreshes"] += 1
+                    threading.Thread(target=self._load, args=(key, loader, expires_at), daemon=True).start()
+                return stale.value
+
+            self._stats["misses"] += 1
+            waiter = self._inflight.get(key)
+            if waiter is None:
+                if not self._may_call(slot, now):
+                    self._stats["backoff_skips"] += 1
+                    return None
+                self._inflight[key] = threading.Event()
+
+        if waiter is not None:
+            # 다른 세션이 이미 호출 중이면 그 결과를 기다린다
+            waiter.wait(self.wait_timeout)
+            with self._lock:
+                entry = self._entries.get(key)
+            return entry.value if entry is not None else None
+        return self._load(key, loader, expires_at)
+
+    def _load(self, key, loader, expires_at):
+        slot = self._slot(key)
+        value = None
+        try:
+            with self._lock:
+                self._stats["upstream_calls"] += 1
+            value = loader(key)
+            with self._lock:
+                self._entries[key] = _Entry(value, expires_at)
+                old = self._latest.get(slot)
+                if old is not None and old != key:
+                    self._entries.pop(old, None)
+                self._latest[slot] = key
+                self._backoff.pop(slot, None)
+        except Exception:
+            with self._lock:
+                fails = self._backoff.get(slot, (0, 0))[0] + 1
+                delay = min(self.retry_base * 2 ** (fails - 1), self.retry_max)
+                self._backoff[slot] = (fails, self.clock() + delay)
+                self._stats["failures"] += 1
+        finally:
+            with self._lock:
+                event = self._inflight.pop(key, None)
+            if event is not None:
+                event.set()
+        return value
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, entries=len(self._entries), inflight=len(self._inflight))
@@ -0,0 +1,114 @@
+import heapq
+from collections import Counter
+
+# ==========================================
+# 오타/자모 허용 퍼지 매칭
+# ==========================================
+# 한글은 초성/중성/종성 자모로 풀어서 비교하므로 '화장싷' -> '화장실'처럼 받침 하나 틀린 것도 잡힌다.
+# 1) 자모 문자열의 문자 bigram 역색인으로 후보를 모으고 (너무 흔한 bigram은 건너뜀)
+# 2) 겹치는 bigram 수 상위 max_candidates개만 남긴 뒤
+# 3) 편집 거리(인접 전치 포함) 유사도로 최종 순위를 매긴다.
+# 후보 수가 상한으로 묶여 있어 어휘가 커져도 지연 시간이 거의 일정하다.
+# 짧은 질의는 글자 하나만 달라도 유사도가 크게 떨어지므로 ('gate' -> 'water'가 0.6)
+# 자모 MIN_QUERY_LEN자 미만은 퍼지 매칭을 하지 않고, SHORT_QUERY_LEN자 미만은 SHORT_THRESHOLD를 요구한다.
+# offline/bundle.js도 같은 규칙을 쓴다 (offline_bundle.py가 값을 실어 보냄).
+
+CHO = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+JUNG = "ㅏㅐㅑㅒㅓㅔㅕㅖㅗㅘㅙㅚㅛㅜㅝㅞㅟㅠㅡㅢㅣ"
+JONG = " ㄱㄲㄳㄴㄵㄶㄷㄹㄺㄻㄼㄽㄾㄿㅀㅁㅂㅄㅅㅆㅇㅈㅊㅋㅌㅍㅎ"
+THRESHOLD = 0.6
+MIN_QUERY_LEN = 3
+SHORT_QUERY_LEN = 6
+SHORT_THRESHOLD = 0.75
+
+
+def to_jamo(text):
+    """한글 음절을 자모로 풀고, 나머지는 소문자로 (공백 제거)."""
+    out = []
+    for ch in text.lower():
+        code = ord(ch) - 0xAC00
+        if 0 <= code < 11172:
+            out.append(CHO[code // 588])
+            out.append(JUNG[(code % 588) // 28])
+            if code % 28:
+                out.append(JONG[code % 28])
+        elif not ch.isspace():
+            out.append(ch)
+    return "".join(out)
+
+
+def bigrams(s):
+    s = f"^{s}$"
+    return [s[i:i + 2] for i in range(len(s) - 1)]
+
+
+def edit_distance(a, b):
+    """인접 문자 전치를 1회 편집으로 치는 편집 거리 (OSA)."""
+    prev2, prev = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        cur = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                cur[j] = min(cur[j], prev2[j - 2] + 1)
+        prev2, prev = prev, cur
+    return prev[len(b)]
+
+
+def min_similarity(query_len, threshold=THRESHOLD):
+    """자모 길이 query_len인 질의가 넘어야 하는 유사도 (너무 짧으면 None: 퍼지 매칭 안 함)."""
+    if query_len < MIN_QUERY_LEN:
+        return None
+    return max(threshold, SHORT_THRESHOLD) if query_len < SHORT_QUERY_LEN else threshold
+
+
+def similarity(a, b):
+    if not a and not b:
+        return 1.0
+    return 1.0 - edit_distance(a, b) / max(len(a), len(b))
+
+
+class FuzzyMatcher:
+    def __init__(self, entries, max_candidates=30, max_posting=5000):
+        """entries: (표면 문자열, 값) 목록. 같은 표면은 처음 것만 쓴다."""
+        self.max_candidates = max_candidates
+        self.max_posting = max_posting
+        self.surfaces = []
+        self.values = []
+        self.jamo = []
+        self.postings = {}
+        seen = set()
+        for surface, value in entries:
+            surface = surface.strip().lower()
+            if not surface or surface in seen:
+                continue
+            seen.add(surface)
+            tid = len(self.surfaces)
+            self.surfaces.append(surface)
+            self.values.append(value)
+            j = to_jamo(surface)
+            self.jamo.append(j)
+            for g in set(bigrams(j)):
+                self.postings.setdefault(g, []).append(tid)
+
+    def match(self, query, limit=3, threshold=THRESHOLD):
+        """query와 비슷한 항목 [(유사도, 표면, 값), ...] (유사도 내림차순)."""
+        q = to_jamo(query)
+        threshold = min_similarity(len(q), threshold)
+        if threshold is None:
+            return []
+        grams = set(bigrams(q))
+        counts = Counter()
+        for g in grams:
+            posting = self.postings.get(g)
+            if posting and len(posting) <= self.max_posting:
+                counts.update(posting)
+        candidates = heapq.nlargest(self.max_candidates, counts.items(), key=lambda kv: kv[1])
+        scored = []
+        for tid, _ in candidates:
+            score = similarity(q, self.jamo[tid])
+            if score >= threshold:
+                scored.append((score, self.surfaces[tid], self.values[tid]))
+        scored.sort(key=lambda x: -x[0])
+        return scored[:limit]
@@ -0,0 +1,146 @@
+import json
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# ==========================================
+# 기상청 단기예보(getVilageFcst) 로컬 스텁
+# ==========================================
+# 벤치마크/부하 테스트를 오프라인으로 돌리기 위한 가짜 API 서버.
+# 실제 응답과 같은 JSON 구조(response.header/body.items.item, pageNo/numOfRows/totalCount)로
+# 발표 시각 이후 3일치 x 시간별 x 카테고리 예보를 만들어 페이지 단위로 돌려준다.
+# latency(초)와 failure_rate(0~1)로 느린 응답과 장애(HTTP 500 / resultCode 오류)를 흉내 낸다.
+#
+#   stub = KMAStub(latency=0.2, failure_rate=0.1).start()
+#   core.WEATHER_URL = stub.url
+#   ...
+#   stub.stop()
+
+CATEGORIES = ["TMP", "UUU", "VVV", "VEC", "WSD", "SKY", "PTY", "POP", "WAV", "PCP", "REH", "SNO"]
+FORECAST_DAYS = 3
+
+
+def forecast_items(base_date, base_time, nx, ny, seed=0):
+    """발표 시각 다음 시간부터 FORECAST_DAYS일치 시간별 예보 항목 (실제 API의 item 형식)."""
+    issued = datetime.strptime(base_date + base_time, "%Y%m%d%H%M")
+    rng = random.Random(f"{base_date}{base_time}{nx}{ny}{seed}")
+    items = []
+    for h in range(1, FORECAST_DAYS * 24 + 1):
+        t = issued + timedelta(hours=h)
+        temp = 4 + 6 * rng.random() - 4 * abs(t.hour - 14) / 14
+        sky = rng.choice([1, 1, 3, 4])
+        pop = rng.choice([0, 0, 10, 20, 30, 60])
+        values = {
+            "TMP": f"{temp:.0f}", "UUU": f"{rng.uniform(-3, 3):.1f}", "VVV": f"{rng.uniform(-3, 3):.1f}",
+            "VEC": str(rng.randrange(360)), "WSD": f"{rng.uniform(0, 6):.1f}", "SKY": str(sky),
+            "PTY": "1" if pop >= 60 else "0", "POP": str(pop), "WAV": "0",
+            "PCP": "1.0mm" if pop >= 60 else "강수없음", "REH": str(rng.randrange(30, 90)), "SNO": "적설없음",
+        }
+        for cat in CATEGORIES:
+            items.append({"baseDate": base_date, "baseTime": base_time, "category": cat,
+                          "fcstDate": t.strftime("%Y%m%d"), "fcstTime": t.strftime("%H00"),
+                          "fcstValue": values[cat], "nx": int(nx), "ny": int(ny)})
+    return items
+
+
+class KMAStub:
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, failure_rate=0.0, seed=0):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.seed = seed
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.failures = 0
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/1360000/VilageFcstInfoService_2.0/getVilageFcst"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="kma-stub", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _should_fail(self):
+        with self._lock:
+            self.calls += 1
+            fail = self._rng.random() < self.failure_rate
+            self.failures += fail
+        return fail
+
+    def respond(self, params):
+        """(HTTP 상태, JSON 본문)."""
+        if self.latency:
+            time.sleep(self.latency)
+        if self._should_fail():
+            if self._rng.random() < 0.5:
+                return 500, {"error": "stub failure"}
+            return 200, {"response": {"header": {"resultCode": "03", "resultMsg": "NO_DATA"}}}
+        try:
+            items = forecast_items(params["base_date"], params["base_time"], params["nx"], params["ny"], self.seed)
+            page = max(1, int(params.get("pageNo", 1)))
+            rows = max(1, int(params.get("numOfRows", 10)))
+        except (KeyError, ValueError):
+            return 200, {"response": {"header": {"resultCode": "10", "resultMsg": "INVALID_REQUEST_PARAMETER_ERROR"}}}
+        chunk = items[(page - 1) * rows:page * rows]
+        return 200, {"response": {
+            "header": {"resultCode": "00", "resultMsg": "NORMAL_SERVICE"},
+            "body": {"dataType": "JSON", "items": {"item": chunk},
+                     "pageNo": page, "numOfRows": rows, "totalCount": len(items)},
+        }}
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True     # 헤더/본문을 따로 쓰므로, 켜 두면 keep-alive 요청마다 ~40ms 지연 ACK 대기
+
+            def do_GET(self):
+                params = {k: v[-1] for k, v in parse_qs(urlparse(self.path).query).items()}
+                status, body = stub.respond(params)
+                data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="기상청 단기예보 로컬 스텁")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    args = parser.parse_args()
+    stub = KMAStub(port=args.port, latency=args.latency, failure_rate=args.failure_rate).start()
+    print(f"KMA stub: {stub.url}  (OLYMATE_WEATHER_URL로 지정)")
+    try:
+        stub._thread.join()
+    except KeyboardInterrupt:
+        stub.stop()
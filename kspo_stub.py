@@ -0,0 +1,119 @@
+import hashlib
+import json
+import random
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# ==========================================
+# KSPO 공연 정보 API 로컬 스텁
+# ==========================================
+# concerts.py가 기대하는 응답 형식으로 공연 목록을 페이지 단위로 돌려준다.
+# ETag / Last-Modified를 붙이고 If-None-Match / If-Modified-Since가 맞으면 304를 준다.
+# upsert()/remove()로 목록을 바꿔 증분 동기화를 시험할 수 있다.
+# validators=False면 검증자 헤더 없이 응답해 내용 해시 비교 경로를 시험한다.
+#
+#   stub = KSPOStub(items).start()
+#   store = ConcertStore(path, venue_key, VENUE_LOCATIONS, url=stub.url, api_key="x")
+
+
+class KSPOStub:
+    def __init__(self, items=(), host="127.0.0.1", port=0, latency=0.0, failure_rate=0.0, validators=True, seed=0):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.validators = validators
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._items = {}
+        self.calls = 0
+        self.not_modified = 0
+        for item in items:
+            self._items[item["perfId"]] = dict(item)
+        self._touch()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/B551014/olpark_perf"
+
+    def start(self):
+        threading.Thread(target=self._server.serve_forever, name="kspo-stub", daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # --- 데이터 변경 ---
+    def _touch(self):
+        body = json.dumps(sorted(self._items.items()), ensure_ascii=False, sort_keys=True).encode("utf-8")
+        self.etag = '"' + hashlib.sha256(body).hexdigest()[:20] + '"'
+        self.modified = time.time()
+
+    def upsert(self, item):
+        with self._lock:
+            self._items[item["perfId"]] = dict(item)
+            self._touch()
+
+    def remove(self, perf_id):
+        with self._lock:
+            self._items.pop(perf_id, None)
+            self._touch()
+
+    # --- 응답 ---
+    def respond(self, params, headers):
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.calls += 1
+            if self._rng.random() < self.failure_rate:
+                return 500, {}, {"error": "stub failure"}
+            items = [self._items[k] for k in sorted(self._items)]
+            etag, modified = self.etag, self.modified
+        last_modified = formatdate(int(modified), usegmt=True)
+        if self.validators and (headers.get("If-None-Match") == etag or
+                                (headers.get("If-Modified-Since") == last_modified and not headers.get("If-None-Match"))):
+            self.not_modified += 1
+            return 304, {"ETag": etag, "Last-Modified": last_modified}, None
+        page = max(1, int(params.get("pageNo", 1)))
+        rows = max(1, int(params.get("numOfRows", 10)))
+        body = {"response": {
+            "header": {"resultCode": "00", "resultMsg": "NORMAL_SERVICE"},
+            "body": {"items": {"item": items[(page - 1) * rows:page * rows]},
+                     "pageNo": page, "numOfRows": rows, "totalCount": len(items)},
+        }}
+        extra = {"ETag": etag, "Last-Modified": last_modified} if self.validators else {}
+        return 200, extra, body
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                params = {k: v[-1] for k, v in parse_qs(urlparse(self.path).query).items()}
+                status, extra, body = stub.respond(params, self.headers)
+                data = b"" if body is None else json.dumps(body, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                for k, v in extra.items():
+                    self.send_header(k, v)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,327 @@
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from bench import FACILITY_QUERIES, RESTAURANT_QUERIES, git_commit, summarize
+
+# ==========================================
+# OlyMate 동시 접속 부하 테스트
+# ==========================================
+# Streamlit AppTest로 실제 app.py를 세션 여러 개로 돌린다. 세션마다 공연 날 관람객 시나리오를 따라간다:
+#   접속 -> 공연 선택 -> 시설 검색 -> (지도 보기) -> 스마트 맵 필터 켜고 끄기 -> (맛집 검색) -> 팬 메시지 작성
+# 기상청 API는 로컬 스텁(kma_stub.py)이 대신하며 지연/실패 비율을 바꿀 수 있다.
+#
+# - AppTest는 실행 중 전역 상태(Runtime 인스턴스, st.secrets, 설정)를 바꾸기 때문에 한 프로세스 안에서는
+#   rerun을 한 번에 하나씩만 돌릴 수 있다. 그래서 --workers 개의 프로세스가 세션을 나눠 맡고,
+#   각 프로세스 안에서는 세션들이 열린 채로 번갈아 rerun한다 (streamlit 서버 프로세스 하나에 세션 여러 개).
+#   run_ms = rerun 실행 시간, wait_ms = 같은 프로세스의 다른 세션 rerun을 기다린 시간,
+#   응답 시간(response) = wait + run 으로 따로 보고한다.
+# - 결과: 단계별/전체 rerun 지연 p50/p99, 처리량(rerun/s, 세션/s), 세션당 메모리(RSS 증가분 / 세션 수),
+#   앱 내부 구간별 시간(profiler), 스텁 호출/실패 수. loadtest_results/ 아래 JSON으로 저장한다.
+#
+#   python loadtest.py                                   # 세션 100개, 프로세스 2개, 동시 25
+#   python loadtest.py --sessions 400 --concurrency 100 --workers 4 --stub-latency 0.3 --stub-failure-rate 0.2
+#   python loadtest.py --think 0.5 --weather-churn 50    # 사용자 대기 시간, 50세션마다 예보 캐시 비우기
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_PATH = os.path.join(BASE_DIR, "app.py")
+RESULTS_DIR = "loadtest_results"
+MAP_TAB, FOOD_TAB, FAN_TAB = 2, 1, 4
+FAN_MESSAGES = ["god 오빠들 화이팅!", "오늘 공연 너무 기대돼요", "KSPO DOME 가는 중 🚇", "see you tonight!",
+                "응원봉 챙겼나요?", "Let's go!!", "1층 플로어 대기 중", "굿즈 줄 어디예요?"]
+
+
+def rss_bytes():
+    """현재 프로세스 RSS. /proc이 없으면 최대 RSS로 대신한다."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+# ==========================================
+# 세션 시나리오 (워커 프로세스 안)
+# ==========================================
+class Session:
+    """AppTest 하나 = 브라우저 탭 하나. step()마다 rerun 한 번의 대기/실행 시간을 잰다."""
+
+    def __init__(self, sid, rng, run_lock, record, timeout=60.0, think=0.0):
+        from streamlit.testing.v1 import AppTest
+
+        self.sid = sid
+        self.rng = rng
+        self.run_lock = run_lock
+        self.record = record
+        self.think = think
+        self.at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+        self.at.secrets["WEATHER_API_KEY"] = "loadtest"
+        self.at.secrets["CONCERT_API_KEY"] = "loadtest"
+
+    def step(self, name, action):
+        if self.think:
+            time.sleep(self.rng.uniform(0, 2 * self.think))
+        queued = time.perf_counter()
+        error = None
+        with self.run_lock:
+            start = time.perf_counter()
+            try:
+                action()
+                if len(self.at.exception):
+                    error = self.at.exception[0].message
+            except Exception as e:      # AppTest 시간 초과, 위젯을 못 찾음 등
+                error = f"{type(e).__name__}: {e}"
+            end = time.perf_counter()
+        self.record(name, (start - queued) * 1000.0, (end - start) * 1000.0, error)
+        return error is None
+
+    def switch_tab(self, tab):
+        return self.step("switch_tab", lambda: self.at.segmented_control(key="active_tab").set_value(tab).run())
+
+    def run(self):
+        at, rng = self.at, self.rng
+        if not self.step("open", at.run):
+            return
+        titles = at.selectbox[0].options
+        self.step("pick_concert", lambda: at.selectbox[0].select(rng.choice(titles)).run())
+
+        if self.step("search_facility", lambda: at.text_input(key="fac_input").input(rng.choice(FACILITY_QUERIES)).run()):
+            map_buttons = [b.key for b in at.button if b.key and b.key.startswith("fac_")]
+            if map_buttons and rng.random() < 0.5:
+                # '지도 보기' -> 강조 마커 + 스마트 맵 탭으로 이동
+                self.step("show_on_map", lambda: at.button(key=rng.choice(map_buttons)).click().run())
+        if at.session_state["active_tab"] != MAP_TAB:
+            self.switch_tab(MAP_TAB)
+        for _ in range(rng.randint(1, 4)):
+            boxes = list(at.checkbox)
+            if not boxes:
+                break
+            box = rng.choice(boxes)
+            self.step("toggle_filter", lambda: (box.uncheck() if box.value else box.check()).run())
+
+        if rng.random() < 0.5 and self.switch_tab(FOOD_TAB):
+            self.step("search_food", lambda: at.text_input(key="food_input").input(rng.choice(RESTAURANT_QUERIES)).run())
+
+        if self.switch_tab(FAN_TAB):
+            self.step("post_message", lambda: self.post(rng.choice(FAN_MESSAGES)))
+
+    def post(self, body):
+        self.at.text_input[0].input(f"{body} #{self.sid}")
+        self.at.button[0].click().run()      # 폼의 '응원하기' 버튼
+
+
+def run_worker(args):
+    import core
+
+    profiler = core.get_profiler()
+    run_lock = threading.Lock()
+    lock = threading.Lock()
+    samples = {}            # 단계 -> [[wait_ms, run_ms], ...]
+    errors = {}
+    error_samples = []
+    sessions = []           # 끝날 때까지 살려 둬서 세션당 메모리를 잰다
+
+    def record(name, wait_ms, run_ms, error):
+        with lock:
+            samples.setdefault(name, []).append([round(wait_ms, 3), round(run_ms, 3)])
+            if error is not None:
+                errors[name] = errors.get(name, 0) + 1
+                if len(error_samples) < 10:
+                    error_samples.append(f"{name}: {error}")
+
+    # 첫 세션 한 번으로 데이터/색인/지도 피라미드를 데워 두고 기준 메모리를 잰다
+    Session(-1, random.Random(args.seed), run_lock, lambda *a: None, args.timeout).run()
+    profiler.reset()
+    rss_base = rss_bytes()
+
+    my_sids = list(range(args.worker, args.sessions, args.workers))
+    churned = [0]
+
+    def one(sid):
+        if args.weather_churn and sid and sid % args.weather_churn == 0:
+            core.get_weather_cache.cache_clear()    # 새 예보 발표 흉내: 다음 세션이 스텁을 다시 부른다
+            churned[0] += 1
+        session = Session(sid, random.Random(args.seed * 100_003 + sid), run_lock, record, args.timeout, args.think)
+        session.run()
+        with lock:
+            sessions.append(session)
+
+    concurrency = max(1, -(-args.concurrency // args.workers))
+    started = time.time()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, my_sids))
+    finished = time.time()
+
+    return {
+        "worker": args.worker,
+        "sessions": len(my_sids),
+        "concurrency": concurrency,
+        "started": started,
+        "finished": finished,
+        "samples": samples,
+        "errors": errors,
+        "error_samples": error_samples,
+        "rss_base": rss_base,
+        "rss_end": rss_bytes(),
+        "rss_max": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+        "sections": profiler.summary(),
+        "weather_cache": core.get_weather_cache().stats(),
+        "weather_churns": churned[0],
+    }
+
+
+# ==========================================
+# 실행 / 집계 (부모 프로세스)
+# ==========================================
+def run_all(args):
+    from kma_stub import KMAStub
+
+    work_dir = tempfile.mkdtemp(prefix="olymate-load-")
+    stub = KMAStub(latency=args.stub_latency, failure_rate=args.stub_failure_rate, seed=args.seed).start()
+    # 워커는 import 시점에 환경 변수를 읽는다: 실제 기상청 API / 실제 팬 DB를 건드리지 않게
+    env = dict(os.environ, OLYMATE_WEATHER_URL=stub.url, OLYMATE_FAN_DB=os.path.join(work_dir, "fan_messages.db"))
+    base_cmd = [sys.executable, os.path.abspath(__file__), "--sessions", str(args.sessions),
+                "--concurrency", str(args.concurrency), "--workers", str(args.workers), "--think", str(args.think),
+                "--timeout", str(args.timeout), "--weather-churn", str(args.weather_churn), "--seed", str(args.seed)]
+    print(f"[load] {args.workers} workers, {args.sessions} sessions, weather stub {stub.url}", file=sys.stderr, flush=True)
+    procs = [subprocess.Popen(base_cmd + ["--worker", str(i)], cwd=BASE_DIR, env=env, stdout=subprocess.PIPE,
+                              text=True) for i in range(args.workers)]
+    workers = []
+    for i, proc in enumerate(procs):
+        out, _ = proc.communicate()
+        if proc.returncode != 0:
+            workers.append({"worker": i, "error": f"worker exited with {proc.returncode}"})
+        else:
+            workers.append(json.loads(out))
+    stub.stop()
+    return aggregate(args, workers, stub)
+
+
+def aggregate(args, workers, stub):
+    ok = [w for w in workers if "error" not in w]
+    wall = (max(w["finished"] for w in ok) - min(w["started"] for w in ok)) if ok else 0.0
+    steps, all_run, all_resp = {}, [], []
+    errors = {}
+    for w in ok:
+        for name, pairs in w["samples"].items():
+            steps.setdefault(name, []).extend(pairs)
+        for name, n in w["errors"].items():
+            errors[name] = errors.get(name, 0) + n
+    for pairs in steps.values():
+        all_run.extend(run for _, run in pairs)
+        all_resp.extend(wait + run for wait, run in pairs)
+    reruns = len(all_run)
+
+    def stats(values):
+        return summarize(values) if values else {"n": 0}
+
+    sessions = sum(w["sessions"] for w in ok)
+    per_session = [(w["rss_end"] - w["rss_base"]) / w["sessions"] for w in ok if w["sessions"]]
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "sessions": args.sessions,
+            "concurrency": args.concurrency,
+            "workers": args.workers,
+            "think_s": args.think,
+            "stub_latency_s": args.stub_latency,
+            "stub_failure_rate": args.stub_failure_rate,
+            "weather_churn": args.weather_churn,
+            "seed": args.seed,
+        },
+        "wall_s": round(wall, 3),
+        "sessions_completed": sessions,
+        "reruns": reruns,
+        "throughput": {"reruns_per_s": round(reruns / wall, 3) if wall else 0.0,
+                       "sessions_per_s": round(sessions / wall, 3) if wall else 0.0},
+        "rerun": stats(all_run),
+        "response": stats(all_resp),
+        "steps": {name: {"run": stats([r for _, r in pairs]), "response": stats([q + r for q, r in pairs]),
+                         "errors": errors.get(name, 0)} for name, pairs in sorted(steps.items())},
+        "errors": sum(errors.values()),
+        "error_samples": [line for w in ok for line in w["error_samples"]][:10],
+        "memory": {
+            "per_session_kb": round(sum(per_session) / len(per_session) / 1024, 1) if per_session else None,
+            "workers": [{"worker": w["worker"], "rss_base_mb": round(w["rss_base"] / 2**20, 1),
+                         "rss_end_mb": round(w["rss_end"] / 2**20, 1), "rss_max_mb": round(w["rss_max"] / 2**20, 1)}
+                        for w in ok],
+        },
+        "sections": {w["worker"]: w["sections"] for w in ok},
+        "weather": {"stub_calls": stub.calls, "stub_failures": stub.failures,
+                    "cache": {w["worker"]: w["weather_cache"] for w in ok}},
+        "worker_errors": [w for w in workers if "error" in w],
+    }
+
+
+def report(results):
+    out = sys.stderr
+    meta, tp = results["meta"], results["throughput"]
+    print(f"\n  sessions {results['sessions_completed']}/{meta['sessions']} (concurrency {meta['concurrency']},"
+          f" workers {meta['workers']})  wall {results['wall_s']:.1f}s  reruns {results['reruns']}"
+          f"  -> {tp['reruns_per_s']:.1f} rerun/s, {tp['sessions_per_s']:.2f} session/s", file=out)
+    for label in ("rerun", "response"):
+        s = results[label]
+        print(f"  {label:<8} p50 {s.get('p50_ms', 0):>8.0f} ms  p99 {s.get('p99_ms', 0):>8.0f} ms"
+              f"  max {s.get('max_ms', 0):>8.0f} ms", file=out)
+    print(f"  {'step':<16} {'n':>5} {'run p50':>9} {'run p99':>9} {'resp p50':>9} {'resp p99':>9}  errors", file=out)
+    for name, s in results["steps"].items():
+        run, resp = s["run"], s["response"]
+        print(f"  {name:<16} {run['n']:>5} {run.get('p50_ms', 0):>9.0f} {run.get('p99_ms', 0):>9.0f}"
+              f" {resp.get('p50_ms', 0):>9.0f} {resp.get('p99_ms', 0):>9.0f}  {s['errors']}", file=out)
+    mem = results["memory"]
+    print(f"  memory: {mem['per_session_kb']} KB/session  "
+          + ", ".join(f"w{w['worker']} {w['rss_base_mb']}->{w['rss_end_mb']} MB" for w in mem["workers"]), file=out)
+    w = results["weather"]
+    print(f"  weather stub: {w['stub_calls']} calls, {w['stub_failures']} failures   errors {results['errors']}", file=out)
+    for line in results["error_samples"]:
+        print(f"  ! {line}", file=out)
+    for w in results["worker_errors"]:
+        print(f"  ! worker {w['worker']}: {w['error']}", file=out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OlyMate concurrent-session load test (AppTest + local KMA stub)")
+    parser.add_argument("--sessions", type=int, default=100, help="시뮬레이션할 세션 수")
+    parser.add_argument("--concurrency", type=int, default=25, help="동시에 열려 있는 세션 수 (워커들 합계)")
+    parser.add_argument("--workers", type=int, default=2, help="세션을 나눠 맡을 프로세스 수")
+    parser.add_argument("--think", type=float, default=0.0, help="단계 사이 평균 대기 시간(초)")
+    parser.add_argument("--timeout", type=float, default=60.0, help="rerun 한 번의 최대 시간(초)")
+    parser.add_argument("--stub-latency", type=float, default=0.1, help="기상청 스텁 응답 지연(초)")
+    parser.add_argument("--stub-failure-rate", type=float, default=0.0, help="기상청 스텁 실패 비율(0~1)")
+    parser.add_argument("--weather-churn", type=int, default=0, help="N세션마다 공유 예보 캐시를 비운다 (0이면 안 함)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="결과 JSON 경로 (기본: loadtest_results/load-<commit>-<시각>.json)")
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker is not None:
+        json.dump(run_worker(args), sys.stdout, default=str)
+        return
+    results = run_all(args)
+    report(results)
+    out = args.out or os.path.join(BASE_DIR, RESULTS_DIR,
+                                   f"load-{results['meta']['commit'] or 'nogit'}-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2, default=str)
+    print(f"[load] 결과 저장: {out}", file=sys.stderr)
+    if results["worker_errors"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+import math
+
+import folium
+import numpy as np
+
+# ==========================================
+# 스마트 맵 레이어 (한 번 만들어 캐시)
+# ==========================================
+# 필터별 마커를 GeoJSON FeatureCollection으로 미리 만들어 두고,
+# rerun마다 체크된 필터의 레이어만 folium.GeoJson 하나로 붙인다.
+# 행마다 folium.Marker/Popup/Icon 객체를 만들던 것보다 빌드 시간과 HTML 크기가 훨씬 작다.
+
+# 필터 키 -> '구분' 검색어 ("맛집"은 음식점 데이터)
+MAP_KEYWORDS = ["화장실", "편의점", "맛집", "흡연", "자판기", "음수대"]
+LAYER_STYLES = {
+    "맛집": {"color": "green", "icon": "cutlery"},
+}
+DEFAULT_STYLE = {"color": "blue", "icon": "cloud"}
+
+
+def facility_label(kind, detail):
+    return f"{kind}" + (f" ({detail})" if detail else "")
+
+
+def _point(lat, lon, props):
+    return {"type": "Feature", "geometry": {"type": "Point", "coordinates": [float(lon), float(lat)]}, "properties": props}
+
+
+def facility_features(fac_df, rows):
+    sub = fac_df.iloc[rows]
+    return [
+        _point(lat, lon, {"id": int(i), "name": facility_label(kind, detail), "popup": facility_label(kind, detail)})
+        for i, kind, detail, lat, lon in zip(rows, sub['구분'], sub['상세위치'], sub['위도'], sub['경도'])
+    ]
+
+
+def restaurant_features(rest_df, rows):
+    sub = rest_df.iloc[rows]
+    return [
+        _point(lat, lon, {"id": int(i), "name": name, "popup": f"<b>{name}</b><br>{desc}"})
+        for i, name, desc, lat, lon in zip(rows, sub['name'], sub['desc'], sub['lat'], sub['lon'])
+    ]
+
+
+def build_layer_geojson(fac_df, rest_df, fac_index):
+    """필터 키별 GeoJSON FeatureCollection (프로세스당 한 번)."""
+    layers = {}
+    for key in MAP_KEYWORDS:
+        if key == "맛집":
+            features = restaurant_features(rest_df, range(len(rest_df)))
+        else:
+            features = facility_features(fac_df, fac_index.lookup(key, fields=("구분",)))
+        layers[key] = {"type": "FeatureCollection", "features": features}
+    return layers
+
+
+def make_layer(key, data):
+    """캐시된 GeoJSON으로 folium 레이어 하나를 만든다 (마커 수와 무관하게 객체 1개)."""
+    style = LAYER_STYLES.get(key, DEFAULT_STYLE)
+    return folium.GeoJson(
+        data,
+        name=key,
+        marker=folium.Marker(icon=folium.Icon(color=style["color"], icon=style["icon"])),
+        popup=folium.GeoJsonPopup(fields=["popup"], labels=False, min_width=200, max_width=300),
+    )
+
+
+# ==========================================
+# 뷰포트 기반 지연 로딩 + 줌 레벨별 클러스터 피라미드
+# ==========================================
+# 웹 메르카토르 타일(256px) 단위로 마커를 나눠 두고 화면에 보이는 타일만 보낸다.
+# CLUSTER_MAX_ZOOM 이하에서는 셀(CELL_PX) 단위로 미리 집계한 클러스터를 보내므로
+# 전송량은 테이블 크기가 아니라 화면에 보이는 셀 개수에 비례한다.
+# - st_folium은 feature_group_to_add의 그룹마다 GeoJson/팝업 JS를 통째로 다시 직렬화하므로
+#   보이는 타일들을 필터 키마다 GeoJson 하나(점 + 클러스터)로 합쳐 보낸다.
+# - 마커가 TILE_SPLIT_MIN개보다 적은 레이어는 나누지 않고 전체를 그대로 보낸다 (이동/확대해도 그룹이 안 바뀜).
+# - 마커 하나가 직렬화되면 약 300B이므로 개별 마커 줌에서도 화면 안 마커 수를 MAX_DETAIL_MARKERS로 묶는다.
+
+TILE_PX = 256
+CELL_PX = 64
+MIN_ZOOM = 10
+CLUSTER_MAX_ZOOM = 15       # 이 줌까지는 클러스터, 그보다 크면 개별 마커
+DETAIL_ZOOM = CLUSTER_MAX_ZOOM + 1
+TILE_SPLIT_MIN = 100        # 레이어 마커가 이보다 적으면 타일/클러스터 없이 한 번에
+MAX_DETAIL_MARKERS = 300    # 개별 마커 줌에서 화면 안 마커가 이보다 많으면 한 단계 위 클러스터를 보낸다
+
+
+def lonlat_to_pixel(lat, lon, zoom):
+    """위경도를 zoom 레벨의 전역 픽셀 좌표(x, y)로 바꾼다 (배열 가능)."""
+    scale = TILE_PX * 2.0 ** zoom
+    lat = np.clip(np.asarray(lat, dtype=np.float64), -85.05112878, 85.05112878)
+    x = (np.asarray(lon, dtype=np.float64) + 180.0) / 360.0 * scale
+    s = np.sin(np.radians(lat))
+    y = (0.5 - np.log((1 + s) / (1 - s)) / (4 * np.pi)) * scale
+    return x, y
+
+
+def pixel_to_lonlat(x, y, zoom):
+    scale = TILE_PX * 2.0 ** zoom
+    lon = x / scale * 360.0 - 180.0
+    lat = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y / scale))))
+    return lat, lon
+
+
+def view_bounds(center, zoom, width, height):
+    """지도 중심/줌/크기(px)로 화면 경계 (south, west, north, east)를 추정한다."""
+    x, y = lonlat_to_pixel(center[0], center[1], zoom)
+    north, west = pixel_to_lonlat(float(x) - width / 2, float(y) - height / 2, zoom)
+    south, east = pixel_to_lonlat(float(x) + width / 2, float(y) + height / 2, zoom)
+    return south, west, north, east
+
+
+def parse_view(map_state):
+    """st_folium 반환값에서 (bounds, zoom)을 꺼낸다. 없으면 None."""
+    if not map_state or not map_state.get("bounds") or map_state.get("zoom") is None:
+        return None
+    sw, ne = map_state["bounds"].get("_southWest") or {}, map_state["bounds"].get("_northEast") or {}
+    if sw.get("lat") is None or ne.get("lat") is None:
+        return None
+    return (sw["lat"], sw["lng"], ne["lat"], ne["lng"]), int(map_state["zoom"])
+
+
+def _cluster_feature(lat, lon, count):
+    radius = 8 + 4 * math.log2(count)
+    return _point(lat, lon, {"cluster": True, "count": int(count), "radius": radius, "popup": f"{count}"})
+
+
+class TilePyramid:
+    def __init__(self, features, split_min=TILE_SPLIT_MIN):
+        self.features = features
+        n = len(features)
+        self.split = n >= split_min
+        self.levels = {}
+        if not self.split:
+            return
+        lons = np.array([f["geometry"]["coordinates"][0] for f in features], dtype=np.float64).reshape(n)
+        lats = np.array([f["geometry"]["coordinates"][1] for f in features], dtype=np.float64).reshape(n)
+        for z in range(MIN_ZOOM, DETAIL_ZOOM + 1):
+            self.levels[z] = self._build_level(lats, lons, z)
+
+    def _build_level(self, lats, lons, z):
+        tiles = {}
+        if not len(lats):
+            return tiles
+        x, y = lonlat_to_pixel(lats, lons, z)
+        if z == DETAIL_ZOOM:
+            # 개별 마커: 타일별 feature 번호
+            tx, ty = (x // TILE_PX).astype(np.int64), (y // TILE_PX).astype(np.int64)
+            for i, key in enumerate(zip(tx.tolist(), ty.tolist())):
+                tiles.setdefault(key, []).append(self.features[i])
+            return tiles
+        # 클러스터: CELL_PX 셀 단위로 개수와 평균 좌표를 집계
+        cx, cy = (x // CELL_PX).astype(np.int64), (y // CELL_PX).astype(np.int64)
+        cells, inverse, counts = np.unique(np.stack([cx, cy], axis=1), axis=0, return_inverse=True, return_counts=True)
+        inverse = inverse.reshape(-1)
+        mean_lat = np.bincount(inverse, weights=lats) / counts
+        mean_lon = np.bincount(inverse, weights=lons) / counts
+        first = np.full(len(cells), -1, dtype=np.int64)
+        first[inverse[::-1]] = np.arange(len(inverse))[::-1]
+        per_tile = TILE_PX // CELL_PX
+        for c, (ccx, ccy) in enumerate(cells.tolist()):
+            if counts[c] == 1:
+                feature = self.features[first[c]]
+            else:
+                feature = _cluster_feature(mean_lat[c], mean_lon[c], counts[c])
+            tiles.setdefault((ccx // per_tile, ccy // per_tile), []).append(feature)
+        return tiles
+
+    @staticmethod
+    def level_for(zoom):
+        return int(min(max(zoom, MIN_ZOOM), DETAIL_ZOOM))
+
+    def tiles_for(self, bounds, zoom):
+        """화면 경계를 덮으면서 데이터가 있는 타일 키 목록 (z, x, y)."""
+        z = self.level_for(zoom)
+        south, west, north, east = bounds
+        x0, y0 = lonlat_to_pixel(north, west, z)
+        x1, y1 = lonlat_to_pixel(south, east, z)
+        tx0, tx1 = int(x0 // TILE_PX), int(x1 // TILE_PX)
+        ty0, ty1 = int(y0 // TILE_PX), int(y1 // TILE_PX)
+        occupied = self.levels[z]
+        if (tx1 - tx0 + 1) * (ty1 - ty0 + 1) > len(occupied):
+            # 아주 넓은 화면: 빈 타일을 일일이 훑지 않고 데이터가 있는 타일만 거른다
+            return sorted((z, tx, ty) for tx, ty in occupied if tx0 <= tx <= tx1 and ty0 <= ty <= ty1)
+        return [(z, tx, ty)
+                for tx in range(tx0, tx1 + 1)
+                for ty in range(ty0, ty1 + 1)
+                if (tx, ty) in occupied]
+
+    def tile(self, z, tx, ty):
+        return self.levels[z].get((tx, ty), [])
+
+    def visible(self, bounds, zoom):
+        """화면에 보이는 타일 묶음 (tuple, 그룹 캐시 키). 나누지 않은 레이어는 항상 None."""
+        if not self.split:
+            return None
+        tiles = tuple(self.tiles_for(bounds, zoom))
+        if self.level_for(zoom) == DETAIL_ZOOM and sum(len(self.tile(*t)) for t in tiles) > MAX_DETAIL_MARKERS:
+            tiles = tuple(self.tiles_for(bounds, CLUSTER_MAX_ZOOM))
+        return tiles
+
+    def features_for(self, tiles):
+        if tiles is None:
+            return self.features
+        features = []
+        for z, tx, ty in tiles:
+            features.extend(self.tile(z, tx, ty))
+        return features
+
+    def query(self, bounds, zoom):
+        return self.features_for(self.visible(bounds, zoom))
+
+
+def build_pyramids(layers):
+    """필터 키별 TilePyramid (build_layer_geojson 결과로부터, 프로세스당 한 번)."""
+    return {key: TilePyramid(data["features"]) for key, data in layers.items()}
+
+
+def make_cluster_layer(key, features):
+    """클러스터 집계 feature들을 숫자가 표시된 원으로 그린다."""
+    style = LAYER_STYLES.get(key, DEFAULT_STYLE)
+    return folium.GeoJson(
+        {"type": "FeatureCollection", "features": features},
+        name=f"{key}_cluster",
+        marker=folium.CircleMarker(radius=10, fill=True, fill_opacity=0.6, weight=1),
+        style_function=lambda f, color=style["color"]: {"radius": f["properties"]["radius"], "color": color, "fillColor": color},
+        tooltip=folium.GeoJsonTooltip(fields=["count"], labels=False),
+    )
+
+
+def make_group(key, features):
+    """필터 key의 (보이는) 마커/클러스터를 담은 FeatureGroup 하나."""
+    group = folium.FeatureGroup(name=key, control=False)
+    points = [f for f in features if not f["properties"].get("cluster")]
+    clusters = [f for f in features if f["properties"].get("cluster")]
+    if points:
+        make_layer(key, {"type": "FeatureCollection", "features": points}).add_to(group)
+    if clusters:
+        make_cluster_layer(key, clusters).add_to(group)
+    return group
+
+
+def viewport_groups(pyramids, keys, bounds, zoom, cache=None):
+    """체크된 필터(keys)마다 화면 안 마커를 합친 FeatureGroup 하나씩.
+    cache(dict)는 (key, 보이는 타일 묶음) -> 그룹이라 보이는 타일이 그대로면 같은 그룹 객체를 돌려준다
+    (st_folium은 그룹 내용이 같으면 지도에 다시 붙이지 않는다)."""
+    groups = []
+    for key in keys:
+        pyramid = pyramids[key]
+        tiles = pyramid.visible(bounds, zoom)
+        group = cache.get((key, tiles)) if cache is not None else None
+        if group is None:
+            group = make_group(key, pyramid.features_for(tiles))
+            if cache is not None:
+                cache[(key, tiles)] = group
+        groups.append(group)
+    return groups
@@ -0,0 +1,456 @@
+"use strict";
+// ==========================================
+// OlyMate 오프라인 번들 (offline_bundle.py가 만든 data.json.gz / layers.geojson.gz 사용)
+// ==========================================
+// 처음 한 번 데이터를 받은 뒤 시설 검색, 맛집 추천, 지도 필터는 모두 브라우저 안에서 처리한다.
+// - 시설 검색: SmartAgent.search_facility와 같은 순서 (동의어 -> '구분' 부분 일치 -> 자모 퍼지 매칭),
+//   결과는 선택한 공연장에서 가까운 순.
+// - 맛집: RestaurantRanker의 BM25 행렬을 그대로 써서 글 점수 + 의도 가산점 + 거리 감쇠로 정렬.
+// - 지도: 필터별 레이어를 SVG 그룹으로 한 번만 그려 두고 체크박스는 표시 여부만 바꾼다.
+
+const EARTH_RADIUS_M = 6371008.8;
+const MAP_ZOOM = 16;            // SVG 좌표계로 쓰는 웹 메르카토르 줌 (앱 지도 기본값과 같음)
+const TILE_PX = 256;
+const CHO = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ";
+const JUNG = "ㅏㅐㅑㅒㅓㅔㅕㅖㅗㅘㅙㅚㅛㅜㅝㅞㅟㅠㅡㅢㅣ";
+const JONG = " ㄱㄲㄳㄴㄵㄶㄷㄹㄺㄻㄼㄽㄾㄿㅀㅁㅂㅄㅅㅆㅇㅈㅊㅋㅌㅍㅎ";
+
+// --- 데이터 읽기 ---
+async function loadGzipJson(url) {
+  const res = await fetch(url);
+  if (!res.ok) throw new Error(`${url}: HTTP ${res.status}`);
+  let bytes = new Uint8Array(await res.arrayBuffer());
+  // 서버가 Content-Encoding: gzip으로 보내면 브라우저가 이미 풀어 준다
+  if (bytes[0] === 0x1f && bytes[1] === 0x8b) {
+    const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream("gzip"));
+    bytes = new Uint8Array(await new Response(stream).arrayBuffer());
+  }
+  return JSON.parse(new TextDecoder().decode(bytes));
+}
+
+function decodeColumn(col) {
+  return col.codes.map((c) => col.values[c]);
+}
+
+function haversineM(lat1, lon1, lat2, lon2) {
+  const rad = Math.PI / 180;
+  const a = Math.sin((lat2 - lat1) * rad / 2) ** 2 +
+    Math.cos(lat1 * rad) * Math.cos(lat2 * rad) * Math.sin((lon2 - lon1) * rad / 2) ** 2;
+  return 2 * EARTH_RADIUS_M * Math.asin(Math.sqrt(Math.min(a, 1)));
+}
+
+function pointDistance(origin, lat, lon) {
+  // 좌표가 없는 행(null)은 가장 먼 것으로 (지도에도 그리지 않는다)
+  return lat === null || lon === null ? Infinity : haversineM(origin[0], origin[1], lat, lon);
+}
+
+function distanceText(dist) {
+  return Number.isFinite(dist) ? ` · ${Math.round(dist)}m` : "";
+}
+
+// --- 자모 퍼지 매칭 (fuzzy.py와 같은 규칙) ---
+function toJamo(text) {
+  let out = "";
+  for (const ch of text.toLowerCase()) {
+    const code = ch.codePointAt(0) - 0xac00;
+    if (code >= 0 && code < 11172) {
+      out += CHO[Math.floor(code / 588)] + JUNG[Math.floor((code % 588) / 28)];
+      if (code % 28) out += JONG[code % 28];
+    } else if (!/\s/.test(ch)) {
+      out += ch;
+    }
+  }
+  return out;
+}
+
+function editDistance(a, b) {
+  // 인접 문자 전치를 1회 편집으로 치는 편집 거리 (OSA)
+  let prev2 = null;
+  let prev = Array.from({ length: b.length + 1 }, (_, j) => j);
+  for (let i = 1; i <= a.length; i++) {
+    const cur = [i];
+    for (let j = 1; j <= b.length; j++) {
+      const cost = a[i - 1] === b[j - 1] ? 0 : 1;
+      cur[j] = Math.min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost);
+      if (i > 1 && j > 1 && a[i - 1] === b[j - 2] && a[i - 2] === b[j - 1]) cur[j] = Math.min(cur[j], prev2[j - 2] + 1);
+    }
+    prev2 = prev;
+    prev = cur;
+  }
+  return prev[b.length];
+}
+
+function minSimilarity(queryLen, rule) {
+  // fuzzy.min_similarity와 같은 규칙: 너무 짧으면 null (퍼지 매칭 안 함), 짧으면 더 높은 기준
+  if (queryLen < rule.min_len) return null;
+  return queryLen < rule.short_len ? Math.max(rule.threshold, rule.short_threshold) : rule.threshold;
+}
+
+function similarity(a, b) {
+  if (!a && !b) return 1;
+  return 1 - editDistance(a, b) / Math.max(a.length, b.length);
+}
+
+// --- 시설 검색 색인 ---
+class FacilitySearch {
+  constructor(fac, synonyms) {
+    this.synonyms = synonyms;
+    this.searchFields = fac.search_fields;
+    this.fuzzyRule = fac.fuzzy;
+    this.n = fac.lat.length;
+    this.lat = fac.lat;
+    this.lon = fac.lon;
+    this.fields = {};
+    for (const [name, col] of Object.entries(fac.columns)) {
+      const rows = col.values.map(() => []);
+      col.codes.forEach((c, i) => rows[c].push(i));
+      this.fields[name] = { values: col.values, rows, column: decodeColumn(col) };
+    }
+    // 오타 허용 어휘: 동의어 -> 대표어, 시설 구분, 위치 (검색할 컬럼과 함께). 같은 표면은 처음 것만
+    this.vocab = [];
+    const seen = new Set();
+    const add = (surface, term, fields) => {
+      const s = surface.trim().toLowerCase();
+      if (!s || seen.has(s)) return;
+      seen.add(s);
+      this.vocab.push({ jamo: toJamo(s), term, fields });
+    };
+    for (const [k, v] of Object.entries(synonyms)) add(k, v, this.searchFields);
+    for (const v of this.fields["구분"].values) if (v) add(v, v, this.searchFields);
+    for (const v of this.fields["위치"].values) if (v) add(v, v, ["위치"]);
+    this.cache = new Map();
+  }
+
+  resolveToken(token) {
+    if (Object.prototype.hasOwnProperty.call(this.synonyms, token)) return this.synonyms[token];
+    return this.fields["구분"].values.some((v) => v.includes(token)) ? token : null;
+  }
+
+  lookup(term, fields = this.searchFields) {
+    // fields 중 하나라도 term을 포함하는 행 번호 (오름차순)
+    const key = `${fields.join("|")}\u0000${term}`;
+    let hit = this.cache.get(key);
+    if (!hit) {
+      const rows = new Set();
+      for (const f of fields) {
+        const index = this.fields[f];
+        index.values.forEach((v, vid) => { if (v.includes(term)) index.rows[vid].forEach((r) => rows.add(r)); });
+      }
+      hit = Array.from(rows).sort((a, b) => a - b);
+      this.cache.set(key, hit);
+    }
+    return hit;
+  }
+
+  fuzzyTerm(tokens) {
+    let best = null;
+    for (const token of tokens) {
+      const q = toJamo(token);
+      const threshold = minSimilarity([...q].length, this.fuzzyRule);
+      if (threshold === null) continue;
+      let top = null;
+      for (const entry of this.vocab) {
+        const score = similarity(q, entry.jamo);
+        if (score >= threshold && (!top || score > top.score)) top = { score, entry };
+      }
+      if (top && (!best || top.score > best.score)) best = top;
+    }
+    return best ? [best.entry.term, best.entry.fields] : null;
+  }
+
+  search(query, origin) {
+    // 반환: { term, rows: [{row, dist}] } (origin이 있으면 가까운 순)
+    const clean = query.replace(/[^\p{L}\p{N}\p{M}_\s]/gu, "").trim().toLowerCase();
+    const tokens = clean.split(/\s+/).filter(Boolean);
+    let target = null;
+    for (const token of tokens) {
+      target = this.resolveToken(token);
+      if (target !== null) break;
+    }
+    let term = target !== null ? target : clean;
+    let rows = this.lookup(term);
+    if (!rows.length && clean) {
+      const fuzzy = this.fuzzyTerm(tokens.length > 1 ? tokens.concat([clean]) : tokens);
+      if (fuzzy) {
+        term = fuzzy[0];
+        rows = this.lookup(term, fuzzy[1]);
+      }
+    }
+    let hits = rows.map((row) => ({ row, dist: null }));
+    if (origin) {
+      hits.forEach((h) => { h.dist = pointDistance(origin, this.lat[h.row], this.lon[h.row]); });
+      hits = hits.map((h, i) => [h, i]).sort((a, b) => a[0].dist - b[0].dist || a[1] - b[1]).map((x) => x[0]);
+    }
+    return { term, rows: hits };
+  }
+}
+
+// --- 맛집 추천 (recommender.py와 같은 토큰화/점수) ---
+function queryTokens(text) {
+  const tokens = [];
+  for (const word of text.toLowerCase().match(/[\p{L}\p{N}\p{M}_]+/gu) || []) {
+    tokens.push(word);
+    if (/[가-힣]/.test(word) && word.length > 2) {
+      for (let i = 0; i < word.length - 1; i++) tokens.push(word.slice(i, i + 2));
+    }
+  }
+  return Array.from(new Set(tokens));
+}
+
+class RestaurantRank {
+  constructor(rest) {
+    this.n = rest.lat.length;
+    this.lat = rest.lat;
+    this.lon = rest.lon;
+    this.vocab = new Map(rest.bm25.vocab.map((t, i) => [t, i]));
+    this.tokPtr = rest.bm25.tok_ptr;
+    this.docs = Int32Array.from(rest.bm25.docs);
+    this.weights = Float32Array.from(rest.bm25.weights);
+    this.intents = rest.intents;
+    this.w = rest.weights;
+  }
+
+  textScores(query) {
+    const scores = new Float64Array(this.n);
+    for (const tok of queryTokens(query)) {
+      const t = this.vocab.get(tok);
+      if (t === undefined) continue;
+      for (let k = this.tokPtr[t]; k < this.tokPtr[t + 1]; k++) scores[this.docs[k]] += this.weights[k];
+    }
+    const q = query.toLowerCase();
+    let max = 0;
+    for (const s of scores) max = Math.max(max, s);
+    const bonus = this.w.intent * Math.max(max, 1);
+    for (const intent of this.intents) {
+      if (intent.keywords.some((x) => q.includes(x))) intent.rows.forEach((r) => { scores[r] += bonus; });
+    }
+    return scores;
+  }
+
+  rank(query, origin) {
+    // 반환: [{row, score, dist}] 점수 내림차순 (같으면 행 번호 순)
+    const text = this.textScores(query);
+    const hits = [];
+    let max = 0;
+    text.forEach((s, row) => { if (s > 0) { hits.push({ row, score: s, dist: null }); max = Math.max(max, s); } });
+    for (const h of hits) {
+      h.score /= max;
+      if (origin) {
+        h.dist = pointDistance(origin, this.lat[h.row], this.lon[h.row]);
+        h.score = (1 - this.w.distance) * h.score + this.w.distance * Math.exp(-h.dist / this.w.decay_m);
+      }
+    }
+    return hits.sort((a, b) => b.score - a.score || a.row - b.row);
+  }
+}
+
+// --- 지도 (SVG, 웹 메르카토르 픽셀 좌표) ---
+function project(lat, lon) {
+  const scale = TILE_PX * 2 ** MAP_ZOOM;
+  const s = Math.sin(Math.max(Math.min(lat, 85.05112878), -85.05112878) * Math.PI / 180);
+  return [(lon + 180) / 360 * scale, (0.5 - Math.log((1 + s) / (1 - s)) / (4 * Math.PI)) * scale];
+}
+
+const SVG_NS = "http://www.w3.org/2000/svg";
+
+function svgEl(name, attrs, parent) {
+  const el = document.createElementNS(SVG_NS, name);
+  for (const [k, v] of Object.entries(attrs)) el.setAttribute(k, v);
+  if (parent) parent.appendChild(el);
+  return el;
+}
+
+function popupText(html) {
+  return String(html).replace(/<br\s*\/?>/gi, "\n").replace(/<[^>]*>/g, "");
+}
+
+class OfflineMap {
+  constructor(svg, info) {
+    this.svg = svg;
+    this.info = info;
+    this.layers = {};
+    this.view = { x: 0, y: 0, w: 1000, h: 700 };
+    this.base = svgEl("g", {}, svg);
+    this.layerRoot = svgEl("g", {}, svg);
+    this.top = svgEl("g", {}, svg);
+    this.enablePan();
+  }
+
+  setView(cx, cy, w) {
+    const rect = this.svg.getBoundingClientRect();
+    const h = w * ((rect.height || 700) / (rect.width || 1000));
+    this.view = { x: cx - w / 2, y: cy - h / 2, w, h };
+    this.svg.setAttribute("viewBox", `${this.view.x} ${this.view.y} ${this.view.w} ${this.view.h}`);
+  }
+
+  center(lat, lon, w = 1400) {
+    const [x, y] = project(lat, lon);
+    this.setView(x, y, w);
+  }
+
+  zoom(factor) {
+    const v = this.view;
+    this.setView(v.x + v.w / 2, v.y + v.h / 2, Math.min(Math.max(v.w * factor, 150), 20000));
+  }
+
+  enablePan() {
+    let drag = null;
+    // 포인터 캡처를 쓰면 마커 click이 SVG로 넘어가므로 window에서 이동/해제를 받는다
+    this.svg.addEventListener("pointerdown", (e) => {
+      drag = { x: e.clientX, y: e.clientY, view: { ...this.view } };
+    });
+    window.addEventListener("pointermove", (e) => {
+      if (!drag) return;
+      const k = this.view.w / (this.svg.getBoundingClientRect().width || 1000);
+      const v = drag.view;
+      this.setView(v.x + v.w / 2 - (e.clientX - drag.x) * k, v.y + v.h / 2 - (e.clientY - drag.y) * k, v.w);
+    });
+    window.addEventListener("pointerup", () => { drag = null; });
+    this.svg.addEventListener("wheel", (e) => { e.preventDefault(); this.zoom(e.deltaY > 0 ? 1.25 : 0.8); }, { passive: false });
+  }
+
+  marker(parent, lat, lon, color, r, label) {
+    const [x, y] = project(lat, lon);
+    const dot = svgEl("circle", { cx: x, cy: y, r, fill: color, stroke: "#fff", "stroke-width": 1.5 }, parent);
+    dot.addEventListener("click", () => { this.info.textContent = popupText(label); });
+    return dot;
+  }
+
+  drawVenues(venues) {
+    const seen = new Set();
+    for (const [name, [lat, lon]] of Object.entries(venues)) {
+      const key = `${lat},${lon}`;
+      const [x, y] = project(lat, lon);
+      if (!seen.has(key)) this.marker(this.base, lat, lon, "red", 9, name);
+      svgEl("text", { x: x + 12, y: y + 4 + (seen.has(key) ? 14 : 0) }, this.base).textContent = name;
+      seen.add(key);
+    }
+  }
+
+  addLayer(key, data, color) {
+    // 필터 하나의 마커를 한 번만 만들어 두고 이후에는 display만 바꾼다
+    const group = svgEl("g", { display: "none" }, this.layerRoot);
+    for (const f of data.features) {
+      const [lon, lat] = f.geometry.coordinates;
+      this.marker(group, lat, lon, color, 5, f.properties.popup);
+    }
+    this.layers[key] = group;
+  }
+
+  toggle(key, on) {
+    if (this.layers[key]) this.layers[key].setAttribute("display", on ? "inline" : "none");
+  }
+
+  highlight(lat, lon, color, label) {
+    this.top.replaceChildren();
+    this.marker(this.top, lat, lon, color, 10, label);
+    this.info.textContent = popupText(label);
+    this.center(lat, lon, Math.min(this.view.w, 900));
+  }
+}
+
+// --- 화면 ---
+async function main() {
+  const $ = (id) => document.getElementById(id);
+  const status = $("status");
+  if ("serviceWorker" in navigator && location.protocol.startsWith("http")) {
+    navigator.serviceWorker.register("sw.js").catch(() => {});
+  }
+  let data, layers, manifest;
+  try {
+    [data, layers, manifest] = await Promise.all([
+      loadGzipJson("data.json.gz"),
+      loadGzipJson("layers.geojson.gz"),
+      fetch("manifest.json").then((r) => r.json()).catch(() => ({})),
+    ]);
+  } catch (err) {
+    status.textContent = `데이터를 불러오지 못했습니다 (${err.message}). http 서버로 열어 주세요.`;
+    return;
+  }
+  const scale = data.coord_scale;
+  const toDeg = (block) => {
+    // 좌표가 없는 행은 null로 온다
+    block.lat = block.lat.map((v) => (v === null ? null : v / scale));
+    block.lon = block.lon.map((v) => (v === null ? null : v / scale));
+  };
+  toDeg(data.facilities);
+  toDeg(data.restaurants);
+  const facilities = new FacilitySearch(data.facilities, data.synonyms);
+  const restaurants = new RestaurantRank(data.restaurants);
+  const rest = Object.fromEntries(Object.entries(data.restaurants.columns).map(([k, col]) => [k, decodeColumn(col)]));
+  const label = (kind, detail) => kind + (detail ? ` (${detail})` : "");
+
+  const map = new OfflineMap($("map"), $("info"));
+  map.drawVenues(data.venues);
+  const filters = $("filters");
+  for (const f of data.filters) {
+    map.addLayer(f.key, layers[f.key] || { features: [] }, f.color);
+    const box = document.createElement("label");
+    const input = document.createElement("input");
+    input.type = "checkbox";
+    input.addEventListener("change", () => map.toggle(f.key, input.checked));
+    box.append(input, ` ${f.key} (${(layers[f.key] || { features: [] }).features.length})`);
+    filters.appendChild(box);
+  }
+
+  const venueSelect = $("venue");
+  for (const name of Object.keys(data.venues)) venueSelect.add(new Option(name, name));
+  venueSelect.value = "KSPO DOME" in data.venues ? "KSPO DOME" : venueSelect.options[0].value;
+  const origin = () => data.venues[venueSelect.value];
+  const resetView = () => map.center(origin()[0], origin()[1]);
+
+  const renderList = (list, items) => {
+    list.replaceChildren(...items.map(([text, sub, onClick]) => {
+      const li = document.createElement("li");
+      li.append(text, " ");
+      const small = document.createElement("small");
+      small.textContent = sub;
+      li.append(small);
+      li.addEventListener("click", onClick);
+      return li;
+    }));
+  };
+
+  const runFacility = () => {
+    const q = $("fac-query").value;
+    if (!q.trim()) { $("fac-summary").textContent = ""; $("fac-results").replaceChildren(); return; }
+    const { term, rows } = facilities.search(q, origin());
+    const kind = facilities.fields["구분"].column;
+    const detail = facilities.fields["상세위치"].column;
+    const where = facilities.fields["위치"].column;
+    $("fac-summary").textContent = rows.length ? `'${term}' ${rows.length}곳` : "검색 결과가 없습니다. (No results)";
+    renderList($("fac-results"), rows.slice(0, 50).map(({ row, dist }) => [
+      label(kind[row], detail[row]), `${where[row]}${distanceText(dist)}`,
+      () => { if (facilities.lat[row] !== null) map.highlight(facilities.lat[row], facilities.lon[row], "blue", label(kind[row], detail[row])); },
+    ]));
+  };
+
+  const runFood = () => {
+    const q = $("food-query").value;
+    if (!q.trim()) { $("food-summary").textContent = ""; $("food-results").replaceChildren(); return; }
+    const hits = restaurants.rank(q, origin());
+    $("food-summary").textContent = hits.length ? `${hits.length}곳 추천` : "조건에 맞는 맛집이 없습니다. (No results)";
+    renderList($("food-results"), hits.map(({ row, dist }) => [
+      `${rest.name[row]} (${rest.category[row]})`, `${rest.desc[row]}${distanceText(dist)}`,
+      () => { if (restaurants.lat[row] !== null) map.highlight(restaurants.lat[row], restaurants.lon[row], "green", `<b>${rest.name[row]}</b><br>${rest.desc[row]}`); },
+    ]));
+  };
+
+  $("fac-query").addEventListener("input", runFacility);
+  $("food-query").addEventListener("input", runFood);
+  venueSelect.addEventListener("change", () => { resetView(); runFacility(); runFood(); });
+  $("zoom-in").addEventListener("click", () => map.zoom(0.7));
+  $("zoom-out").addEventListener("click", () => map.zoom(1.4));
+  $("zoom-reset").addEventListener("click", resetView);
+  resetView();
+
+  const built = manifest.built_at ? ` · ${manifest.built_at.slice(0, 10)}` : "";
+  status.textContent = `시설 ${facilities.n}곳 · 맛집 ${restaurants.n}곳 준비 완료 - 이후 검색/필터는 네트워크 없이 동작합니다${built}`;
+}
+
+if (typeof document !== "undefined") {
+  document.addEventListener("DOMContentLoaded", main);
+} else if (typeof module !== "undefined") {
+  // node에서 검색/추천 결과를 Python 쪽과 대조할 때 사용
+  module.exports = { FacilitySearch, RestaurantRank, queryTokens, toJamo, similarity, haversineM };
+}
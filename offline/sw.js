@@ -0,0 +1,25 @@
+"use strict";
+// OlyMate 오프라인 번들 서비스 워커
+// 설치 때 번들 파일 전체를 캐시하고, 같은 출처 GET 요청은 캐시에서 먼저 응답한다.
+// 캐시 이름과 파일 목록은 offline_bundle.py가 빌드할 때 채워 넣는다 (번들이 바뀌면 캐시 이름도 바뀜).
+
+const CACHE = "__CACHE_NAME__";
+const FILES = __FILES__;
+
+self.addEventListener("install", (event) => {
+  event.waitUntil(caches.open(CACHE).then((cache) => cache.addAll(FILES)).then(() => self.skipWaiting()));
+});
+
+self.addEventListener("activate", (event) => {
+  event.waitUntil(
+    caches.keys()
+      .then((keys) => Promise.all(keys.filter((k) => k.startsWith("olymate-offline-") && k !== CACHE).map((k) => caches.delete(k))))
+      .then(() => self.clients.claim())
+  );
+});
+
+self.addEventListener("fetch", (event) => {
+  const request = event.request;
+  if (request.method !== "GET" || new URL(request.url).origin !== self.location.origin) return;
+  event.respondWith(caches.match(request, { ignoreSearch: true }).then((hit) => hit || fetch(request)));
+});
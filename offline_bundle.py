@@ -0,0 +1,196 @@
+import gzip
+import hashlib
+import json
+import math
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+
+from core import DATA_DIR, SYNONYMS, VENUE_LOCATIONS, load_data
+from data_cache import SCHEMAS, file_sha256
+from fuzzy import MIN_QUERY_LEN, SHORT_QUERY_LEN, SHORT_THRESHOLD, THRESHOLD
+from map_layers import DEFAULT_STYLE, LAYER_STYLES, MAP_KEYWORDS, build_layer_geojson
+from recommender import DISTANCE_DECAY_M, DISTANCE_WEIGHT, INTENT_WEIGHT, INTENTS, RestaurantRanker
+from search_index import SEARCH_FIELDS
+
+# ==========================================
+# 공연 당일 오프라인 번들 (정적 파일만으로 검색/필터)
+# ==========================================
+# 공연 시간대에는 KSPO DOME 주변 통신망이 포화돼 검색/필터마다 Streamlit 웹소켓 왕복을 기다려야 한다.
+# 한 번 내려받아 두면 이후 상호작용이 전부 브라우저 안에서 끝나도록 정적 번들을 만든다.
+#
+#   <out>/index.html, bundle.js, sw.js   offline/ 의 정적 파일 (sw.js에는 캐시 이름/파일 목록을 채워 넣음)
+#   <out>/data.json.gz                   시설/맛집 열 데이터 + 공연장 좌표 + 동의어 + 검색 색인 + 맛집 BM25 행렬
+#   <out>/layers.geojson.gz              스마트 맵 필터별 GeoJSON (앱과 같은 build_layer_geojson 결과)
+#   <out>/manifest.json                  파일별 크기/sha256, 원본 CSV 해시, 건수
+#
+# - 문자열 열은 사전 인코딩(고유값 목록 + 코드), 좌표는 1e-6도 정수로 저장하고 gzip(mtime=0)으로 묶는다.
+#   좌표가 없는 행은 null로 두고 (bundle.js는 지도/거리에서 건너뜀) 레이어 GeoJSON에서는 뺀다.
+#   시설이나 맛집이 하나도 없으면 번들을 만들지 않고 ValueError.
+#   같은 데이터면 .gz 파일과 sw.js 캐시 이름이 바이트 단위로 같게 나온다.
+# - 시설 검색 색인은 열별 고유값 -> 행 목록이다. 브라우저는 고유값(수백 개)에서 부분 문자열을 찾고
+#   동의어 -> 구분 부분 일치 -> 자모 퍼지 매칭 순서로 SmartAgent.search_facility와 같은 결과를 낸다.
+# - 맛집은 RestaurantRanker의 CSC 행렬(토큰, tok_ptr, docs, weights)과 의도 가중치를 그대로 실어
+#   점수가 서버와 같다. 혼잡도는 날짜/시간대별 모델이라 번들에는 넣지 않는다 (글 점수 + 거리만).
+# - sw.js가 설치 때 번들 파일 전체를 캐시하므로 두 번째 방문부터는 네트워크 없이도 열린다.
+#
+#   python offline_bundle.py --out offline_dist
+#   python -m http.server -d offline_dist 8000
+
+BUNDLE_VERSION = 1
+STATIC_DIR = os.path.join(DATA_DIR, "offline")
+COORD_SCALE = 1_000_000
+WEIGHT_DECIMALS = 4
+
+
+def _encode(values):
+    """문자열 열 -> {"values": 고유값 목록, "codes": 행별 코드}."""
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object).fillna("").astype(str))
+    return {"values": uniques.tolist(), "codes": codes.tolist()}
+
+
+def _coords(values):
+    # 빈 좌표를 0으로 채우면 (0°, 0°)에 찍혀 지도 범위가 늘어나므로 None(null)으로
+    degrees = pd.to_numeric(pd.Series(values, dtype=object), errors="coerce").to_numpy(np.float64)
+    finite = np.isfinite(degrees)
+    scaled = np.round(np.where(finite, degrees, 0) * COORD_SCALE).astype(np.int64).tolist()
+    return [v if ok else None for v, ok in zip(scaled, finite.tolist())]
+
+
+def facility_payload(fac_df):
+    return {
+        "columns": {col: _encode(fac_df[col] if col in fac_df.columns else [""] * len(fac_df))
+                    for col in ("구분", "위치", "상세위치")},
+        "lat": _coords(fac_df.get("위도", [])),
+        "lon": _coords(fac_df.get("경도", [])),
+        "search_fields": list(SEARCH_FIELDS),
+        # fuzzy.py와 같은 퍼지 매칭 기준 (짧은 질의는 더 엄격하게)
+        "fuzzy": {"threshold": THRESHOLD, "min_len": MIN_QUERY_LEN, "short_len": SHORT_QUERY_LEN,
+                  "short_threshold": SHORT_THRESHOLD},
+    }
+
+
+def restaurant_payload(rest_df, ranker):
+    vocab = sorted(ranker.vocab, key=ranker.vocab.get)
+    return {
+        "columns": {col: _encode(rest_df[col]) for col in ("name", "category", "desc")},
+        "lat": _coords(rest_df["lat"]),
+        "lon": _coords(rest_df["lon"]),
+        "bm25": {
+            "vocab": vocab,
+            "tok_ptr": ranker.tok_ptr.astype(np.int64).tolist(),
+            "docs": ranker.docs.astype(np.int64).tolist(),
+            "weights": np.round(ranker.weights.astype(np.float64), WEIGHT_DECIMALS).tolist(),
+        },
+        "intents": [{"keywords": keywords, "rows": rows.tolist()}
+                    for (keywords, _), (_, rows) in zip(INTENTS, ranker.intent_rows)],
+        "weights": {"intent": INTENT_WEIGHT, "distance": DISTANCE_WEIGHT, "decay_m": DISTANCE_DECAY_M},
+    }
+
+
+def _round_layers(layers):
+    # 좌표는 6자리(약 10cm)면 충분하다. 좌표가 없는 마커는 뺀다 (NaN은 JSON에도 못 넣는다)
+    for data in layers.values():
+        data["features"] = [f for f in data["features"] if all(map(math.isfinite, f["geometry"]["coordinates"]))]
+        for f in data["features"]:
+            f["geometry"]["coordinates"] = [round(c, 6) for c in f["geometry"]["coordinates"]]
+    return layers
+
+
+def build_payload(fac_df, rest_df, fac_index, ranker=None):
+    """(data, layers): data.json.gz와 layers.geojson.gz에 들어갈 dict."""
+    ranker = ranker if ranker is not None else RestaurantRanker(rest_df)
+    data = {
+        "version": BUNDLE_VERSION,
+        "venues": VENUE_LOCATIONS,
+        "synonyms": SYNONYMS,
+        "facilities": facility_payload(fac_df),
+        "restaurants": restaurant_payload(rest_df, ranker),
+        "filters": [{"key": key, **LAYER_STYLES.get(key, DEFAULT_STYLE)} for key in MAP_KEYWORDS],
+        "coord_scale": COORD_SCALE,
+    }
+    layers = _round_layers(build_layer_geojson(fac_df, rest_df, fac_index))
+    return data, layers
+
+
+def _gzip_json(obj):
+    raw = json.dumps(obj, ensure_ascii=False, separators=(",", ":"), sort_keys=True).encode("utf-8")
+    return gzip.compress(raw, compresslevel=9, mtime=0), len(raw)
+
+
+def _write(path, blob):
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(blob)
+    os.replace(tmp, path)
+
+
+def write_bundle(out_dir, data, layers, data_dir=DATA_DIR, static_dir=STATIC_DIR):
+    """번들 파일을 out_dir에 쓰고 manifest dict를 돌려준다."""
+    os.makedirs(out_dir, exist_ok=True)
+    files, raw_sizes = {}, {}
+    for name, obj in (("data.json.gz", data), ("layers.geojson.gz", layers)):
+        blob, raw_sizes[name] = _gzip_json(obj)
+        _write(os.path.join(out_dir, name), blob)
+        files[name] = blob
+    for name in ("index.html", "bundle.js"):
+        shutil.copyfile(os.path.join(static_dir, name), os.path.join(out_dir, name))
+        with open(os.path.join(out_dir, name), "rb") as f:
+            files[name] = f.read()
+
+    # 서비스 워커: 내용 해시로 캐시 이름을 정해 번들이 바뀌면 예전 캐시를 버린다
+    digest = hashlib.sha256(b"".join(hashlib.sha256(files[k]).digest() for k in sorted(files))).hexdigest()[:16]
+    with open(os.path.join(static_dir, "sw.js"), encoding="utf-8") as f:
+        sw = f.read()
+    sw = sw.replace("__CACHE_NAME__", f"olymate-offline-{digest}")
+    sw = sw.replace("__FILES__", json.dumps(["./"] + sorted(files) + ["manifest.json"]))
+    files["sw.js"] = sw.encode("utf-8")
+    _write(os.path.join(out_dir, "sw.js"), files["sw.js"])
+
+    manifest = {
+        "version": BUNDLE_VERSION,
+        "bundle": digest,
+        "built_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "files": {name: {"bytes": len(blob), "sha256": hashlib.sha256(blob).hexdigest(),
+                         **({"raw_bytes": raw_sizes[name]} if name in raw_sizes else {})}
+                  for name, blob in sorted(files.items())},
+        "sources": {spec["source"]: file_sha256(os.path.join(data_dir, spec["source"]))
+                    for spec in SCHEMAS.values() if os.path.exists(os.path.join(data_dir, spec["source"]))},
+        "counts": {"facilities": len(data["facilities"]["lat"]), "restaurants": len(data["restaurants"]["lat"]),
+                   "layer_features": {k: len(v["features"]) for k, v in layers.items()}},
+    }
+    with open(os.path.join(out_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    return manifest
+
+
+def build_bundle(out_dir, data_dir=DATA_DIR, cache_dir=None):
+    fac_df, _, _, rest_df, fac_index = load_data(data_dir, cache_dir)[:5]
+    # 빈 번들은 공연 당일 아무것도 찾지 못하므로 조용히 내보내지 않는다
+    if fac_df.empty or rest_df.empty:
+        raise ValueError(f"no data to bundle in {data_dir}: {len(fac_df)} facilities, {len(rest_df)} restaurants")
+    data, layers = build_payload(fac_df, rest_df, fac_index)
+    return write_bundle(out_dir, data, layers, data_dir)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="공연 당일 오프라인 정적 번들 (검색/필터를 브라우저에서)")
+    parser.add_argument("--out", default=os.path.join(DATA_DIR, "offline_dist"))
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--cache-dir", default=None)
+    args = parser.parse_args()
+    t0 = time.perf_counter()
+    try:
+        manifest = build_bundle(args.out, args.data_dir, args.cache_dir)
+    except ValueError as e:
+        parser.exit(1, f"error: {e}\n")
+    for name, info in manifest["files"].items():
+        raw = f" (raw {info['raw_bytes'] / 1024:.1f} KB)" if "raw_bytes" in info else ""
+        print(f"{name:<18} {info['bytes'] / 1024:8.1f} KB{raw}")
+    total = sum(info["bytes"] for info in manifest["files"].values())
+    print(f"total {total / 1024:.1f} KB -> {args.out} in {time.perf_counter() - t0:.2f}s")
@@ -0,0 +1,246 @@
+import bisect
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# ==========================================
+# rerun 구간별 계측 (세션별 기록 + 히스토그램 + Prometheus)
+# ==========================================
+# - start_rerun(session_id) ~ finish_rerun() 사이에서 span(name)으로 감싼 구간의 시간을 잰다.
+#   st.fragment 본문은 fragment(session_id, name)으로 감싼다: 전체 rerun 안에서는 구간 하나,
+#   조각만 다시 돌 때는 scope=name인 별도 rerun 기록 ("fragment:<name>" 히스토그램).
+#   st.rerun()/st.stop()/위젯 클릭/예외는 스크립트를 중간에 끝내므로 스크립트 본문을 try/finally로 감싸 finish_rerun()을 부른다.
+#   닫지 않으면 스레드에 남은 기록 때문에 다음 조각 rerun이 '전체 rerun 안'으로 잘못 잡힌다.
+# - 구간 시간은 (1) 현재 rerun 기록(세션별 최근 history개)과 (2) 프로세스 공용 히스토그램에 쌓인다.
+# - 비용은 구간당 perf_counter 두 번 + 잠금 한 번 + bisect 한 번 (수 µs) 이라 운영 중에도 켜 둘 수 있다.
+#   OLYMATE_PROFILE=0이면 span()이 아무것도 하지 않는 객체를 돌려준다.
+# - prometheus()는 Prometheus 텍스트 형식, serve_metrics()는 /metrics HTTP 엔드포인트.
+
+BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("profiler", "name", "record", "start")
+
+    def __init__(self, profiler, name, record):
+        self.profiler = profiler
+        self.name = name
+        self.record = record
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.observe(self.name, (time.perf_counter() - self.start) * 1000.0, self.record)
+        return False
+
+
+class _FragmentRun:
+    __slots__ = ("profiler", "session_id", "name", "record")
+
+    def __init__(self, profiler, session_id, name):
+        self.profiler = profiler
+        self.session_id = session_id
+        self.name = name
+
+    def __enter__(self):
+        self.record = self.profiler.start_rerun(self.session_id, scope=self.name)
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.finish_rerun(self.record)
+        return False
+
+
+class _Histogram:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self, n_buckets):
+        self.counts = [0] * (n_buckets + 1)    # 마지막 칸은 +Inf
+        self.sum = 0.0
+        self.count = 0
+
+
+class Profiler:
+    def __init__(self, buckets_ms=BUCKETS_MS, history=20, max_sessions=500, enabled=True):
+        self.buckets_ms = tuple(buckets_ms)
+        self.history = history
+        self.max_sessions = max_sessions
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._hist = {}                      # 구간 이름 -> _Histogram
+        self._sessions = OrderedDict()       # session_id -> deque(rerun 기록), 최근 사용 순
+        self._local = threading.local()
+
+    # --- rerun 단위 ---
+    def start_rerun(self, session_id, scope="app"):
+        """현재 스레드의 rerun 기록을 시작한다. 이전 rerun이 예외로 끝났어도 덮어쓴다.
+        scope는 전체 스크립트면 "app", 조각(fragment)만 다시 돌면 그 이름."""
+        record = {"session": session_id, "scope": scope, "started": time.time(), "start": time.perf_counter(),
+                  "spans": {}}
+        self._local.record = record
+        return record
+
+    def current(self):
+        return getattr(self._local, "record", None)
+
+    def finish_rerun(self, record=None):
+        """rerun 기록을 닫는다. 이미 닫힌 기록이면 그대로 돌려준다 (st.rerun() 전에 먼저 닫은 경우)."""
+        record = record or self.current()
+        if record is None:
+            return None
+        if self.current() is record:
+            self._local.record = None
+        if "start" not in record:
+            return record
+        total = (time.perf_counter() - record.pop("start")) * 1000.0
+        record["total_ms"] = total
+        self.observe("rerun" if record.get("scope", "app") == "app" else f"fragment:{record['scope']}", total, None)
+        if not self.enabled:
+            return record
+        with self._lock:
+            runs = self._sessions.pop(record["session"], None) or deque(maxlen=self.history)
+            runs.append(record)
+            self._sessions[record["session"]] = runs
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        return record
+
+    # --- 구간 ---
+    def span(self, name):
+        """with profiler.span("search_facility"): ... 로 구간 시간을 잰다."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, self.current())
+
+    def fragment(self, session_id, name):
+        """with profiler.fragment(session_id, "map"): st.fragment 본문을 감싼다."""
+        if not self.enabled:
+            return _NULL_SPAN
+        if self.current() is not None:
+            return self.span(name)
+        return _FragmentRun(self, session_id, name)
+
+    def wrap(self, name, fn):
+        """다른 스레드(워커 풀)에서 실행될 fn을 감싸, 호출한 쪽 rerun 기록에 시간을 남긴다."""
+        if not self.enabled:
+            return fn
+        record = self.current()
+
+        def timed(*args, **kwargs):
+            with _Span(self, name, record):
+                return fn(*args, **kwargs)
+        return timed
+
+    def observe(self, name, ms, record=None):
+        if not self.enabled:
+            return
+        slot = bisect.bisect_left(self.buckets_ms, ms)
+        with self._lock:
+            hist = self._hist.get(name)
+            if hist is None:
+                hist = self._hist[name] = _Histogram(len(self.buckets_ms))
+            hist.counts[slot] += 1
+            hist.sum += ms
+            hist.count += 1
+            if record is not None:
+                spans = record["spans"]
+                spans[name] = spans.get(name, 0.0) + ms
+
+    # --- 조회 ---
+    def session_records(self, session_id):
+        with self._lock:
+            return list(self._sessions.get(session_id, ()))
+
+    def _quantile(self, hist, q):
+        # Prometheus histogram_quantile처럼 버킷 안에서 선형 보간
+        if not hist.count:
+            return 0.0
+        rank = q * hist.count
+        seen, lower = 0, 0.0
+        for i, n in enumerate(hist.counts):
+            upper = self.buckets_ms[i] if i < len(self.buckets_ms) else self.buckets_ms[-1]
+            if seen + n >= rank and n:
+                return lower + (upper - lower) * (rank - seen) / n
+            seen += n
+            lower = upper
+        return self.buckets_ms[-1]
+
+    def summary(self):
+        """구간별 [{name, count, mean_ms, p50_ms, p90_ms, p99_ms}] (평균이 큰 순)."""
+        with self._lock:
+            rows = [{"name": name, "count": h.count, "mean_ms": h.sum / h.count,
+                     "p50_ms": self._quantile(h, 0.5), "p90_ms": self._quantile(h, 0.9), "p99_ms": self._quantile(h, 0.99)}
+                    for name, h in self._hist.items() if h.count]
+        return sorted(rows, key=lambda r: -r["mean_ms"])
+
+    def prometheus(self, prefix="olymate"):
+        """Prometheus 텍스트 노출 형식 (버킷 경계는 초 단위)."""
+        metric = f"{prefix}_section_duration_seconds"
+        lines = [f"# HELP {metric} Time spent in each named section of a rerun or request.",
+                 f"# TYPE {metric} histogram"]
+        with self._lock:
+            for name in sorted(self._hist):
+                h = self._hist[name]
+                label = name.replace("\\", "\\\\").replace('"', '\\"')
+                cumulative = 0
+                for le, n in zip(self.buckets_ms, h.counts):
+                    cumulative += n
+                    lines.append(f'{metric}_bucket{{section="{label}",le="{le / 1000.0:g}"}} {cumulative}')
+                lines.append(f'{metric}_bucket{{section="{label}",le="+Inf"}} {h.count}')
+                lines.append(f'{metric}_sum{{section="{label}"}} {h.sum / 1000.0:.6f}')
+                lines.append(f'{metric}_count{{section="{label}"}} {h.count}')
+            sessions = len(self._sessions)
+        lines += [f"# HELP {prefix}_profiled_sessions Sessions with recorded reruns.",
+                  f"# TYPE {prefix}_profiled_sessions gauge",
+                  f"{prefix}_profiled_sessions {sessions}"]
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._hist.clear()
+            self._sessions.clear()
+
+
+def profiling_enabled():
+    return os.environ.get("OLYMATE_PROFILE", "1").lower() not in ("0", "false", "off")
+
+
+def serve_metrics(profiler, port, host="0.0.0.0"):
+    """profiler.prometheus()를 GET /metrics로 노출하는 백그라운드 HTTP 서버."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            data = profiler.prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="olymate-metrics", daemon=True).start()
+    return server
@@ -0,0 +1,132 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+from spatial import haversine_m
+
+# ==========================================
+# 맛집/카페 추천 점수 엔진 (BM25 + 의도 가중치 + 거리/혼잡도)
+# ==========================================
+# - 이름/분류/설명을 소문자 토큰으로 미리 쪼개 토큰 x 문서 BM25 가중치 행렬(CSC: 토큰별 문서/가중치 구간)을 만들어 둔다.
+#   한글 단어는 단어 자체 + 글자 bigram + 글자 unigram으로 색인해 '국수' -> '국수집' 같은 부분 일치도 잡는다.
+# - 질의 점수 = 질의 토큰들의 BM25 가중치 합 (+ 배고파/카페 의도면 해당 분류에 가산점).
+# - 정렬 점수 = 글 점수(0~1 정규화)와 공연장과의 가까움(거리 감쇠)을 섞고, 혼잡도만큼 깎는다.
+# - 점수 계산은 일치한 문서에 대해서만 배열 연산으로 하고, 상위 k개는 argpartition으로 고른다.
+
+K1 = 1.2
+B = 0.75
+FIELD_WEIGHTS = {"name": 2.0, "category": 2.0, "desc": 1.0}
+HUNGRY_KEYWORDS = ["배고파", "밥", "맛집", "hungry", "rice", "meal", "restaurant", "food", "lunch", "dinner"]
+CAFE_KEYWORDS = ["목말라", "커피", "카페", "cafe", "coffee", "tea", "thirsty", "quiet"]
+INTENTS = [
+    (HUNGRY_KEYWORDS, ["음식점", "한식", "중식", "국수", "BBQ", "한정식"]),
+    (CAFE_KEYWORDS, ["카페", "제과점"]),
+]
+INTENT_WEIGHT = 0.6       # 의도 분류 가산점 (정규화 전 최고 글 점수 대비 비율)
+DISTANCE_WEIGHT = 0.35    # 정렬 점수에서 가까움이 차지하는 비율
+DISTANCE_DECAY_M = 800.0
+CROWD_WEIGHT = 0.3        # 혼잡도 100점일 때 깎이는 점수
+
+_WORD = re.compile(r"\w+")
+_HANGUL = re.compile("[가-힣]")
+
+
+def doc_tokens(text):
+    tokens = []
+    for word in _WORD.findall(str(text).lower()):
+        tokens.append(word)
+        if _HANGUL.search(word) and len(word) > 1:
+            tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+            tokens.extend(word)
+    return tokens
+
+
+def query_tokens(text):
+    tokens = []
+    for word in _WORD.findall(text.lower()):
+        tokens.append(word)
+        if _HANGUL.search(word) and len(word) > 2:
+            tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+    return list(dict.fromkeys(tokens))
+
+
+class RestaurantRanker:
+    def __init__(self, rest_df, k1=K1, b=B):
+        self.n = n = len(rest_df)
+        self.lats = np.asarray(rest_df['lat'], dtype=np.float64) if n else np.empty(0)
+        self.lons = np.asarray(rest_df['lon'], dtype=np.float64) if n else np.empty(0)
+        self.categories = rest_df['category'].astype(str).to_numpy() if n else np.empty(0, dtype=object)
+
+        # 필드별로 고유 문자열만 토큰화하고, (토큰 id, 문서) 쌍을 배열로 펼친다
+        self.vocab = {}
+        keys, weights = [], []
+        lengths = np.zeros(n)
+        for field, weight in FIELD_WEIGHTS.items():
+            if field not in rest_df.columns or not n:
+                continue
+            codes, uniques = pd.factorize(rest_df[field].fillna("").astype(str))
+            token_lists = [[self.vocab.setdefault(t, len(self.vocab)) for t in doc_tokens(u)] for u in uniques]
+            u_len = np.fromiter(map(len, token_lists), dtype=np.int64, count=len(token_lists))
+            u_tok = np.fromiter((t for ts in token_lists for t in ts), dtype=np.int64, count=int(u_len.sum()))
+            u_ptr = np.concatenate(([0], np.cumsum(u_len)))
+            per_doc = u_len[codes]
+            lengths += weight * per_doc
+            docs = np.repeat(np.arange(n, dtype=np.int64), per_doc)
+            # 문서마다 자기 고유 문자열의 토큰 구간 [u_ptr[c], u_ptr[c+1])을 이어 붙인 위치
+            offsets = np.arange(len(docs)) - np.repeat(np.cumsum(per_doc) - per_doc, per_doc)
+            keys.append(u_tok[np.repeat(u_ptr[codes], per_doc) + offsets] * n + docs)
+            weights.append(np.full(len(docs), weight))
+
+        # 같은 (토큰, 문서) 합치기 -> 토큰 순 정렬된 CSC 행렬 (tok_ptr, docs, BM25 가중치)
+        keys = np.concatenate(keys) if keys else np.empty(0, dtype=np.int64)
+        pairs, inverse = np.unique(keys, return_inverse=True)
+        freq = np.bincount(inverse, weights=np.concatenate(weights) if weights else None, minlength=len(pairs))
+        toks, docs = np.divmod(pairs, max(n, 1))
+        df = np.bincount(toks, minlength=len(self.vocab))
+        idf = np.log(1 + (n - df + 0.5) / (df + 0.5))
+        norm = k1 * (1 - b + b * lengths / max(lengths.mean() if n else 1.0, 1e-9))
+        self.tok_ptr = np.concatenate(([0], np.cumsum(df)))
+        self.docs = docs
+        self.weights = (idf[toks] * freq * (k1 + 1) / (freq + norm[docs])).astype(np.float32)
+
+        self.intent_rows = [(keywords, np.flatnonzero(np.isin(self.categories, cats))) for keywords, cats in INTENTS]
+
+    def text_scores(self, query):
+        """(일치 문서 번호, 글 점수). 의도 가산점 포함, 점수 0인 문서는 빠진다."""
+        scores = np.zeros(self.n, dtype=np.float32)
+        for tok in query_tokens(query):
+            t = self.vocab.get(tok)
+            if t is not None:
+                lo, hi = self.tok_ptr[t], self.tok_ptr[t + 1]
+                scores[self.docs[lo:hi]] += self.weights[lo:hi]    # 한 토큰의 문서 번호는 중복이 없다
+        q = query.lower()
+        bonus = INTENT_WEIGHT * max(float(scores.max()) if self.n else 0.0, 1.0)
+        for keywords, rows in self.intent_rows:
+            if any(x in q for x in keywords):
+                scores[rows] += bonus
+        rows = np.flatnonzero(scores > 0)
+        return rows, scores[rows]
+
+    def rank(self, query, origin=None, k=None, crowd_fn=None):
+        """상위 문서 (행 번호, 정렬 점수, 거리 m 또는 None, 혼잡도 또는 None), 점수 내림차순.
+        crowd_fn(lats, lons)가 있으면 후보들의 혼잡도(0~100)만큼 점수를 깎는다."""
+        rows, text = self.text_scores(query)
+        if not len(rows):
+            empty = np.empty(0)
+            return rows, text, None if origin is None else empty, None if crowd_fn is None else empty
+        score = text / text.max()
+        dist = crowd = None
+        if origin is not None:
+            dist = haversine_m(origin[0], origin[1], self.lats[rows], self.lons[rows])
+            score = (1 - DISTANCE_WEIGHT) * score + DISTANCE_WEIGHT * np.nan_to_num(np.exp(-dist / DISTANCE_DECAY_M))
+        if crowd_fn is not None:
+            crowd = np.asarray(crowd_fn(self.lats[rows], self.lons[rows]), dtype=np.float64)
+            score = score - CROWD_WEIGHT * crowd / 100.0
+        if k is not None and k < len(rows):
+            top = np.argpartition(-score, k - 1)[:k]
+        else:
+            top = np.arange(len(rows))
+        top = top[np.lexsort((rows[top], -score[top]))]
+        pick = lambda a: None if a is None else a[top]
+        return rows[top], score[top], pick(dist), pick(crowd)
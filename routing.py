@@ -0,0 +1,211 @@
+import heapq
+
+import numpy as np
+
+from spatial import SpatialIndex, haversine_m
+
+# ==========================================
+# 보행 경로 엔진
+# ==========================================
+# 노드: 편의시설 좌표 + 공연장 좌표 + 광장/구역 중심점('위치'별 시설 좌표 평균).
+# 간선: 각 노드를 가까운 이웃 k개와 잇고 (직선거리 x 우회 계수), 떨어진 덩어리는 최단 간선으로 연결.
+# 공연장마다 Dijkstra 최단 경로 트리를 미리 만들어 두므로
+# "걸어서 가장 가까운 화장실"이나 경로 폴리라인은 배열 조회만으로 끝난다.
+# 임의 두 지점 사이 경로는 A* (직선거리 휴리스틱)로 계산한다.
+# 좌표가 비어 있는(NaN) 시설은 간선 없는 노드로 남아 보행 거리가 inf다 (walk_minutes는 None).
+
+WALK_SPEED_M_PER_MIN = 72.0     # 약 4.3 km/h
+DETOUR = 1.25                   # 실제 보행로는 직선보다 길다
+
+
+class WalkingGraph:
+    def __init__(self, fac_df, venue_locations, k=6, max_edge_m=300.0, detour=DETOUR):
+        lats = list(map(float, fac_df['위도'])) if len(fac_df) else []
+        lons = list(map(float, fac_df['경도'])) if len(fac_df) else []
+        self.n_fac = len(lats)
+
+        # 공연장 노드 (같은 좌표의 별칭은 한 노드)
+        self.venue_node = {}
+        coord_node = {}
+        for name, (lat, lon) in venue_locations.items():
+            key = (round(lat, 7), round(lon, 7))
+            if key not in coord_node:
+                coord_node[key] = len(lats)
+                lats.append(lat)
+                lons.append(lon)
+            self.venue_node[name] = coord_node[key]
+
+        # 광장/구역 중심점 노드 (보행로 교차점 역할)
+        if len(fac_df) and '위치' in fac_df.columns:
+            centers = fac_df.assign(_lat=fac_df['위도'].astype(float), _lon=fac_df['경도'].astype(float)) \
+                            .groupby('위치', sort=False)[['_lat', '_lon']].mean()
+            lats.extend(centers['_lat'].tolist())
+            lons.extend(centers['_lon'].tolist())
+
+        self.lats = np.asarray(lats, dtype=np.float64)
+        self.lons = np.asarray(lons, dtype=np.float64)
+        self.n = len(self.lats)
+        self.finite = np.isfinite(self.lats) & np.isfinite(self.lons)
+        self.geo = SpatialIndex(self.lats, self.lons)
+        self.detour = detour
+        self._build_edges(k, max_edge_m)
+
+        # 공연장별 최단 경로 트리 + 시설을 보행 거리순으로 정렬한 순서
+        self.trees = {}
+        self.order = {}
+        for node in set(self.venue_node.values()):
+            dist, pred = self.dijkstra(node)
+            self.trees[node] = (dist, pred)
+            self.order[node] = np.argsort(dist[:self.n_fac], kind="stable")
+
+    # --- 그래프 구성 ---
+    def _build_edges(self, k, max_edge_m):
+        edges = {}
+        for i in np.flatnonzero(self.finite).tolist():
+            ids, dist = self.geo.knn(self.lats[i], self.lons[i], k + 1, max_radius_m=max_edge_m)
+            for j, d in zip(ids.tolist(), dist.tolist()):
+                if j != i:
+                    edges[(min(i, j), max(i, j))] = d * self.detour
+        self._link_components(edges)
+
+        src = np.array([a for a, b in edges] + [b for a, b in edges], dtype=np.int64)
+        dst = np.array([b for a, b in edges] + [a for a, b in edges], dtype=np.int64)
+        w = np.array(list(edges.values()) * 2, dtype=np.float64)
+        order = np.argsort(src, kind="stable")
+        self.indptr = np.searchsorted(src[order], np.arange(self.n + 1))
+        self.indices = dst[order]
+        self.weights = w[order]
+        self.n_edges = len(edges)
+
+    def _components(self, edges):
+        parent = list(range(self.n))
+
+        def find(x):
+            while parent[x] != x:
+                parent[x] = parent[parent[x]]
+                x = parent[x]
+            return x
+
+        for a, b in edges:
+            ra, rb = find(a), find(b)
+            if ra != rb:
+                parent[ra] = rb
+        return np.array([find(i) for i in range(self.n)], dtype=np.int64)
+
+    def _link_components(self, edges):
+        # 멀리 떨어진 덩어리는 가장 큰 덩어리와 최단 간선 하나로 잇는다 (좌표 없는 노드는 제외)
+        while self.finite.any():
+            roots = self._components(edges)
+            labels, counts = np.unique(roots[self.finite], return_counts=True)
+            if len(labels) <= 1:
+                return
+            main = labels[np.argmax(counts)]
+            in_main = roots == main
+            for label in labels[labels != main]:
+                members = np.flatnonzero(roots == label)
+                best = None
+                for i in members:
+                    ids, dist = self.geo.knn(self.lats[i], self.lons[i], 1, mask=in_main)
+                    if len(ids) and (best is None or dist[0] < best[2]):
+                        best = (int(i), int(ids[0]), float(dist[0]))
+                if best is not None:
+                    a, b, d = best
+                    edges[(min(a, b), max(a, b))] = d * self.detour
+
+    # --- 탐색 ---
+    def dijkstra(self, source):
+        dist = np.full(self.n, np.inf)
+        pred = np.full(self.n, -1, dtype=np.int64)
+        dist[source] = 0.0
+        heap = [(0.0, source)]
+        indptr, indices, weights = self.indptr, self.indices, self.weights
+        while heap:
+            d, u = heapq.heappop(heap)
+            if d > dist[u]:
+                continue
+            for e in range(indptr[u], indptr[u + 1]):
+                v = indices[e]
+                nd = d + weights[e]
+                if nd < dist[v]:
+                    dist[v] = nd
+                    pred[v] = u
+                    heapq.heappush(heap, (nd, v))
+        return dist, pred
+
+    def astar(self, source, target):
+        """두 노드 사이 최단 경로 (거리, 노드 목록). 경로가 없으면 (inf, [])."""
+        h = haversine_m(self.lats[target], self.lons[target], self.lats, self.lons) * self.detour
+        g = {source: 0.0}
+        pred = {source: -1}
+        heap = [(h[source], source)]
+        closed = set()
+        while heap:
+            _, u = heapq.heappop(heap)
+            if u == target:
+                return g[u], self._unwind(pred, target)
+            if u in closed:
+                continue
+            closed.add(u)
+            for e in range(self.indptr[u], self.indptr[u + 1]):
+                v = int(self.indices[e])
+                nd = g[u] + self.weights[e]
+                if nd < g.get(v, np.inf):
+                    g[v] = nd
+                    pred[v] = u
+                    heapq.heappush(heap, (nd + h[v], v))
+        return np.inf, []
+
+    @staticmethod
+    def _unwind(pred, node):
+        path = []
+        while node != -1:
+            path.append(int(node))
+            node = pred[node]
+        return path[::-1]
+
+    # --- 조회 (공연장 기준은 미리 계산한 트리에서) ---
+    def walk_distances(self, venue, fac_rows):
+        """공연장에서 시설 행(fac_rows)까지의 보행 거리(m)."""
+        dist, _ = self.trees[self.venue_node[venue]]
+        return dist[np.asarray(fac_rows, dtype=np.int64)]
+
+    def nearest(self, venue, fac_rows, k=5):
+        """fac_rows 중 보행 거리가 가장 짧은 k개 (행 번호, 거리)."""
+        node = self.venue_node[venue]
+        mask = np.zeros(self.n_fac, dtype=bool)
+        mask[np.asarray(fac_rows, dtype=np.int64)] = True
+        order = self.order[node]
+        picked = order[mask[order]][:k]
+        return picked, self.trees[node][0][picked]
+
+    def route(self, venue, fac_row):
+        """공연장 -> 시설 보행 경로 ([[위도, 경도], ...], 거리). 닿을 수 없는 시설이면 ([], inf)."""
+        dist, pred = self.trees[self.venue_node[venue]]
+        if not np.isfinite(dist[fac_row]):
+            return [], float(dist[fac_row])
+        node = int(fac_row)
+        path = []
+        while node != -1:
+            path.append(node)
+            node = int(pred[node])
+        path.reverse()
+        return [[float(self.lats[i]), float(self.lons[i])] for i in path], float(dist[fac_row])
+
+    def snap(self, lat, lon):
+        ids, dist = self.geo.knn(lat, lon, 1)
+        return int(ids[0]), float(dist[0])
+
+    def route_between(self, start, end):
+        """임의의 두 좌표 사이 보행 경로 (가까운 노드로 붙여 A*)."""
+        s, ds = self.snap(*start)
+        t, dt = self.snap(*end)
+        dist, path = self.astar(s, t)
+        points = [list(start)] + [[float(self.lats[i]), float(self.lons[i])] for i in path] + [list(end)]
+        return points, dist + ds + dt
+
+
+def walk_minutes(distance_m):
+    """보행 거리(m) -> 분. 경로가 없는 거리(inf/NaN)면 None."""
+    if not np.isfinite(distance_m):
+        return None
+    return max(1, int(round(distance_m / WALK_SPEED_M_PER_MIN)))
@@ -0,0 +1,109 @@
+from functools import lru_cache
+
+import numpy as np
+
+from fuzzy import FuzzyMatcher
+
+# ==========================================
+# 시설 검색용 역색인 (토큰 / 부분문자열)
+# ==========================================
+# load_data()에서 한 번만 만들고 모든 세션이 공유한다.
+# 각 컬럼의 고유값(distinct value)마다 길이 MAX_GRAM 이하의 모든 부분문자열을 색인하므로
+# `str.contains(term)`와 같은 결과를 dict 조회 한 번으로 얻을 수 있다.
+# MAX_GRAM보다 긴 검색어는 앞부분으로 후보를 좁힌 뒤 `in` 으로 검증한다.
+# lookup() 결과는 최근 LOOKUP_CACHE_SIZE개만 기억한다 (키가 사용자 검색어라 개수 제한이 필요).
+
+MAX_GRAM = 8
+LOOKUP_CACHE_SIZE = 1024
+INDEX_FIELDS = ("구분", "위치", "상세위치")
+SEARCH_FIELDS = ("구분", "상세위치")
+
+
+class _FieldIndex:
+    def __init__(self, values, max_gram):
+        self.max_gram = max_gram
+        self.values = []          # 고유값 목록
+        self.rows = []            # 고유값별 행 번호(np.ndarray)
+        self.grams = {}           # 부분문자열 -> 고유값 id 목록
+
+        value_ids = {}
+        buckets = []
+        for pos, v in enumerate(values):
+            vid = value_ids.get(v)
+            if vid is None:
+                vid = value_ids[v] = len(self.values)
+                self.values.append(v)
+                buckets.append([])
+            buckets[vid].append(pos)
+        self.rows = [np.asarray(b, dtype=np.int64) for b in buckets]
+
+        for vid, v in enumerate(self.values):
+            seen = set()
+            n = len(v)
+            for i in range(n):
+                for j in range(i + 1, min(n, i + max_gram) + 1):
+                    seen.add(v[i:j])
+            for g in seen:
+                self.grams.setdefault(g, []).append(vid)
+        self.all_ids = list(range(len(self.values)))
+
+    def value_ids(self, term):
+        if term == "":
+            return self.all_ids
+        if len(term) <= self.max_gram:
+            return self.grams.get(term, [])
+        # 긴 검색어: 앞부분 n-gram으로 후보를 찾고 실제 포함 여부를 확인
+        return [vid for vid in self.grams.get(term[:self.max_gram], []) if term in self.values[vid]]
+
+    def contains(self, term):
+        return bool(self.value_ids(term))
+
+    def row_ids(self, term):
+        ids = self.value_ids(term)
+        if not ids:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate([self.rows[vid] for vid in ids])
+
+
+class FacilityIndex:
+    def __init__(self, fac_df, synonyms=None, max_gram=MAX_GRAM):
+        self.n_rows = len(fac_df)
+        self.fields = {}
+        for col in INDEX_FIELDS:
+            values = fac_df[col].astype(str).tolist() if col in fac_df.columns else [""] * self.n_rows
+            self.fields[col] = _FieldIndex(values, max_gram)
+
+        # 토큰 -> 검색어 해석표 (동의어 사전 우선, 그다음 '구분' 컬럼 부분문자열)
+        self.token_terms = {g: g for g in self.fields["구분"].grams}
+        self.token_terms.update(synonyms or {})
+        self._lookup = lru_cache(maxsize=LOOKUP_CACHE_SIZE)(self._lookup_rows)
+
+        # 오타 허용 검색 어휘: 동의어 -> 대표어, 시설 구분, 위치 (검색할 컬럼과 함께)
+        vocab = [(k, (v, SEARCH_FIELDS)) for k, v in (synonyms or {}).items()]
+        vocab += [(v, (v, SEARCH_FIELDS)) for v in self.fields["구분"].values if v]
+        vocab += [(v, (v, ("위치",))) for v in self.fields["위치"].values if v]
+        self.fuzzy = FuzzyMatcher(vocab)
+
+    def resolve_token(self, token):
+        """토큰을 검색어로 바꾼다. 동의어도 '구분' 부분문자열도 아니면 None."""
+        term = self.token_terms.get(token)
+        if term is None and len(token) > self.fields["구분"].max_gram and self.fields["구분"].contains(token):
+            term = token
+        return term
+
+    def fuzzy_term(self, tokens):
+        """정확히 일치하는 것이 없을 때 오타/자모 유사도로 (검색어, 컬럼)을 고른다. 없으면 None."""
+        best = None
+        for token in tokens:
+            for score, _, target in self.fuzzy.match(token, limit=1):
+                if best is None or score > best[0]:
+                    best = (score, target)
+        return best[1] if best else None
+
+    def lookup(self, term, fields=SEARCH_FIELDS):
+        """fields 중 하나라도 term을 포함하는 행 번호(오름차순)를 돌려준다."""
+        return self._lookup(term, tuple(fields))
+
+    def _lookup_rows(self, term, fields):
+        parts = [self.fields[f].row_ids(term) for f in fields]
+        return np.unique(np.concatenate(parts)) if parts else np.empty(0, dtype=np.int64)
@@ -0,0 +1,123 @@
+import numpy as np
+
+# ==========================================
+# 위경도 공간 색인 (균일 격자)
+# ==========================================
+# 점들을 cell_m 크기의 격자 셀로 나눠 셀 번호 순으로 정렬해 둔다.
+# 같은 격자 행(row)의 연속된 열(col)은 정렬 배열에서도 연속 구간이므로
+# 박스 질의는 행마다 searchsorted 두 번으로 끝난다. 행 수가 수십만 개로 늘어도
+# 질의 비용은 주변 셀에 들어 있는 점 개수에만 비례한다.
+# 좌표가 NaN/inf인 점은 색인에서 빠지고, 그런 좌표로 질의하면 빈 결과를 돌려준다.
+
+EARTH_RADIUS_M = 6371008.8
+M_PER_DEG_LAT = np.pi * EARTH_RADIUS_M / 180.0
+
+
+def _empty():
+    return np.empty(0, dtype=np.int64), np.empty(0)
+
+
+def _finite(*values):
+    return all(np.isfinite(v) for v in values)
+
+
+def haversine_m(lat1, lon1, lat2, lon2):
+    """두 좌표(배열 가능) 사이의 대원 거리(m)."""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(x, dtype=np.float64)) for x in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+class SpatialIndex:
+    def __init__(self, lats, lons, cell_m=50.0):
+        self.lats = np.asarray(lats, dtype=np.float64)
+        self.lons = np.asarray(lons, dtype=np.float64)
+        self.cell_m = cell_m
+        valid = np.flatnonzero(np.isfinite(self.lats) & np.isfinite(self.lons))
+        self.size = len(valid)
+
+        if self.size:
+            self.lat0 = float(self.lats[valid].min())
+            self.lon0 = float(self.lons[valid].min())
+            mid_lat = float(np.median(self.lats[valid]))
+        else:
+            self.lat0 = self.lon0 = mid_lat = 0.0
+        self.dlat = cell_m / M_PER_DEG_LAT
+        self.dlon = cell_m / (M_PER_DEG_LAT * max(np.cos(np.radians(mid_lat)), 1e-6))
+
+        rows = np.floor((self.lats[valid] - self.lat0) / self.dlat).astype(np.int64)
+        cols = np.floor((self.lons[valid] - self.lon0) / self.dlon).astype(np.int64)
+        self.n_rows = int(rows.max()) + 1 if self.size else 0
+        self.n_cols = int(cols.max()) + 1 if self.size else 0
+        keys = rows * self.n_cols + cols
+        order = np.argsort(keys, kind="stable")
+        self.keys = keys[order]
+        self.ids = valid[order]
+
+    # --- 내부 도우미 ---
+    def _cell(self, lat, lon):
+        return int(np.floor((lat - self.lat0) / self.dlat)), int(np.floor((lon - self.lon0) / self.dlon))
+
+    def _box_ids(self, south, west, north, east):
+        if not self.size or not _finite(south, west, north, east):
+            return np.empty(0, dtype=np.int64)
+        r0, c0 = self._cell(south, west)
+        r1, c1 = self._cell(north, east)
+        r0, c0 = max(r0, 0), max(c0, 0)
+        r1, c1 = min(r1, self.n_rows - 1), min(c1, self.n_cols - 1)
+        if r0 > r1 or c0 > c1:
+            return np.empty(0, dtype=np.int64)
+        rows = np.arange(r0, r1 + 1, dtype=np.int64)
+        lo = np.searchsorted(self.keys, rows * self.n_cols + c0, side="left")
+        hi = np.searchsorted(self.keys, rows * self.n_cols + c1, side="right")
+        parts = [self.ids[a:b] for a, b in zip(lo, hi) if b > a]
+        return np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+
+    def _around(self, lat, lon, radius_m):
+        dlat = radius_m / M_PER_DEG_LAT
+        # 박스 가장자리(극 쪽)의 경도 폭 기준으로 잡아야 원을 다 덮는다
+        dlon = radius_m / (M_PER_DEG_LAT * max(np.cos(np.radians(min(abs(lat) + dlat, 89.9))), 1e-6))
+        return self._box_ids(lat - dlat, lon - dlon, lat + dlat, lon + dlon)
+
+    # --- 질의 ---
+    def distances(self, lat, lon, ids=None):
+        """(lat, lon)에서 ids(기본: 전체) 각 점까지의 거리(m)."""
+        if ids is None:
+            return haversine_m(lat, lon, self.lats, self.lons)
+        ids = np.asarray(ids, dtype=np.int64)
+        return haversine_m(lat, lon, self.lats[ids], self.lons[ids])
+
+    def bbox(self, south, west, north, east):
+        """박스 안의 점 id (id 오름차순)."""
+        ids = self._box_ids(south, west, north, east)
+        keep = (self.lats[ids] >= south) & (self.lats[ids] <= north) & (self.lons[ids] >= west) & (self.lons[ids] <= east)
+        return np.sort(ids[keep])
+
+    def radius(self, lat, lon, radius_m, mask=None):
+        """반경 radius_m 이내의 점 (id, 거리) - 가까운 순."""
+        if not _finite(lat, lon):
+            return _empty()
+        ids = self._around(lat, lon, radius_m)
+        if mask is not None:
+            ids = ids[mask[ids]]
+        dist = self.distances(lat, lon, ids)
+        keep = dist <= radius_m
+        ids, dist = ids[keep], dist[keep]
+        order = np.argsort(dist, kind="stable")
+        return ids[order], dist[order]
+
+    def knn(self, lat, lon, k, mask=None, max_radius_m=None):
+        """가장 가까운 k개 점 (id, 거리). mask(bool 배열)로 후보를 제한할 수 있다."""
+        if k <= 0 or not self.size or not _finite(lat, lon):
+            return _empty()
+        # 격자 전체를 덮는 반경을 넘으면 더 넓혀도 새 점이 없다
+        span = haversine_m(self.lat0, self.lon0, self.lat0 + self.n_rows * self.dlat, self.lon0 + self.n_cols * self.dlon)
+        span += float(haversine_m(lat, lon, self.lat0, self.lon0))
+        limit = span if max_radius_m is None else min(span, max_radius_m)
+        r = self.cell_m
+        while True:
+            r = min(r, limit)
+            ids, dist = self.radius(lat, lon, r, mask)
+            if len(ids) >= k or r >= limit:
+                return ids[:k], dist[:k]
+            r *= 2
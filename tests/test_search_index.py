@@ -0,0 +1,58 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core import SYNONYMS
+from data_cache import load_table
+from search_index import LOOKUP_CACHE_SIZE, MAX_GRAM, SEARCH_FIELDS, FacilityIndex
+
+DATA_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope="module")
+def fac_df(tmp_path_factory):
+    # 앱과 같은 경로(열 캐시: 빈 칸은 "")로 읽는다
+    df = load_table("facilities", DATA_DIR, str(tmp_path_factory.mktemp("cache")))
+    # MAX_GRAM보다 긴 값과 빈 값도 섞는다
+    extra = pd.DataFrame({"구분": ["화장실", "음수대", ""], "위치": ["평화의 광장", "", "몽촌해자"],
+                          "상세위치": ["KSPO DOME 북문 맞은편 계단 아래 화장실", "", "장미광장 남쪽 입구"]})
+    return pd.concat([df[list(extra.columns)].astype(str), extra], ignore_index=True)
+
+
+def contains_rows(df, term, fields):
+    # 예전 SmartAgent.search_facility가 쓰던 str.contains 경로
+    mask = np.zeros(len(df), dtype=bool)
+    for col in fields:
+        mask |= df[col].astype(str).str.contains(term, regex=False).to_numpy()
+    return np.flatnonzero(mask)
+
+
+def terms(df):
+    values = {v for col in ("구분", "위치", "상세위치") for v in df[col].astype(str)}
+    found = {""}
+    for v in values:
+        for i in range(len(v)):
+            for n in (1, 2, 3, MAX_GRAM, MAX_GRAM + 1, MAX_GRAM + 5):
+                found.add(v[i:i + n])
+    found.update(SYNONYMS.values())
+    found.update(["없는시설", "화장실X", "nan", "DOME", "dome", " ", "광장 남"])
+    return sorted(found)
+
+
+def test_lookup_matches_str_contains(fac_df):
+    index = FacilityIndex(fac_df, SYNONYMS)
+    for fields in (SEARCH_FIELDS, ("위치",), ("구분", "위치", "상세위치")):
+        for term in terms(fac_df):
+            np.testing.assert_array_equal(index.lookup(term, fields), contains_rows(fac_df, term, fields),
+                                          err_msg=f"{term!r} {fields}")
+
+
+def test_lookup_cache_is_bounded(fac_df):
+    index = FacilityIndex(fac_df, SYNONYMS)
+    for i in range(LOOKUP_CACHE_SIZE * 3):
+        index.lookup(f"질의{i}")
+    assert index._lookup.cache_info().currsize == LOOKUP_CACHE_SIZE
+    # 캐시에서 밀려난 뒤 다시 물어도 같은 결과
+    np.testing.assert_array_equal(index.lookup("화장실"), contains_rows(fac_df, "화장실", SEARCH_FIELDS))
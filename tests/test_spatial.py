@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from spatial import SpatialIndex, haversine_m
+
+
+@pytest.fixture(scope="module")
+def points():
+    rng = np.random.default_rng(0)
+    lats = 37.515 + rng.random(2000) * 0.02
+    lons = 127.11 + rng.random(2000) * 0.03
+    lats[::97] = np.nan     # 좌표가 빈 행은 색인에서 빠진다
+    return lats, lons
+
+
+def brute(lats, lons, lat, lon):
+    dist = haversine_m(lat, lon, lats, lons)
+    ids = np.flatnonzero(np.isfinite(dist))
+    order = np.argsort(dist[ids], kind="stable")
+    return ids[order], dist[ids][order]
+
+
+@pytest.mark.parametrize("lat, lon", [(37.5207, 127.1215), (37.515, 127.11), (37.60, 127.20), (37.40, 127.00)])
+def test_knn_matches_brute_force(points, lat, lon):
+    lats, lons = points
+    index = SpatialIndex(lats, lons)
+    expect_ids, expect_dist = brute(lats, lons, lat, lon)
+    for k in (1, 5, 50):
+        ids, dist = index.knn(lat, lon, k)
+        np.testing.assert_allclose(dist, expect_dist[:k])
+        assert set(ids) == set(expect_ids[:k])
+
+
+@pytest.mark.parametrize("radius_m", [30.0, 200.0, 1500.0])
+def test_radius_matches_brute_force(points, radius_m):
+    lats, lons = points
+    index = SpatialIndex(lats, lons)
+    expect_ids, expect_dist = brute(lats, lons, 37.5207, 127.1215)
+    keep = expect_dist <= radius_m
+    ids, dist = index.radius(37.5207, 127.1215, radius_m)
+    np.testing.assert_allclose(dist, expect_dist[keep])
+    assert set(ids) == set(expect_ids[keep])
+
+
+def test_mask_matches_brute_force(points):
+    lats, lons = points
+    index = SpatialIndex(lats, lons)
+    mask = np.zeros(len(lats), dtype=bool)
+    mask[::3] = True
+    expect_ids, _ = brute(np.where(mask, lats, np.nan), lons, 37.5207, 127.1215)
+    ids, _ = index.knn(37.5207, 127.1215, 10, mask=mask)
+    assert set(ids) == set(expect_ids[:10])
+
+
+@pytest.mark.parametrize("lat, lon", [(np.nan, 127.12), (37.52, np.inf), (-np.inf, np.nan)])
+def test_non_finite_query_is_empty(points, lat, lon):
+    index = SpatialIndex(*points)
+    for ids, dist in (index.knn(lat, lon, 5), index.radius(lat, lon, 500.0)):
+        assert len(ids) == 0 and len(dist) == 0
+    assert len(index.bbox(lat, lon, 37.6, 127.2)) == 0